@@ -0,0 +1,79 @@
+import os
+import math
+import numpy as np
+import faiss
+
+# Corpora below this many vectors keep an exact flat index
+ANN_THRESHOLD = int(os.getenv("ANN_THRESHOLD", "20000"))
+# ivf or hnsw above the threshold
+ANN_INDEX = os.getenv("ANN_INDEX", "ivf")
+# none, sq8 (4x smaller vectors) or pq (32x smaller); hnsw supports none and sq8
+ANN_QUANTIZATION = os.getenv("ANN_QUANTIZATION", "sq8")
+# Search-time accuracy knobs, applied whenever an index is built or loaded
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "128"))
+
+HNSW_M = 32
+PQ_SUBVECTOR_DIMS = 8
+
+
+def factory_string(n, dim, kind=None, quantization=None, threshold=None):
+    """faiss.index_factory description for a corpus of n vectors."""
+    kind = kind or ANN_INDEX
+    quantization = quantization or ANN_QUANTIZATION
+    threshold = ANN_THRESHOLD if threshold is None else threshold
+    if n < threshold or kind == "flat":
+        return "Flat"
+
+    if quantization == "pq" and dim % PQ_SUBVECTOR_DIMS == 0:
+        codec = f"PQ{dim // PQ_SUBVECTOR_DIMS}"
+    elif quantization in ("sq8", "pq"):
+        codec = "SQ8"
+    else:
+        codec = "Flat"
+
+    if kind == "hnsw":
+        return f"HNSW{HNSW_M}" if codec == "Flat" else f"HNSW{HNSW_M}_SQ8"
+    # ~4*sqrt(n) lists, with at least 39 training points per list as faiss recommends
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+    return f"IVF{nlist},{codec}"
+
+
+def set_search_params(index):
+    """Apply the configured nprobe / efSearch; a no-op for flat indexes."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(IVF_NPROBE, ivf.nlist)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+
+def build_index(vectors, description=None, add=True):
+    """Create and train an index for the given vectors, and add them in row order unless add=False."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    description = description or factory_string(n, dim)
+    index = faiss.index_factory(dim, description)
+    if not index.is_trained:
+        index.train(vectors)
+    if add:
+        index.add(vectors)
+    print(f"Built {description} index over {n} vectors")
+    return set_search_params(index)
+
+
+def needs_upgrade(index):
+    """True for a flat index that has grown past the ANN threshold (e.g. through refreshes)."""
+    return isinstance(index, faiss.IndexFlat) and factory_string(index.ntotal, index.d) != "Flat"
+
+
+def upgrade(index):
+    """Rebuild a flat index as the configured ANN type, keeping vector positions."""
+    return build_index(index.reconstruct_n(0, index.ntotal))
+
+
+def recall_at_k(exact_ids, approx_ids):
+    """Fraction of the exact top-k neighbours that the approximate search also returned."""
+    hits = sum(len(set(e[e >= 0]) & set(a[a >= 0])) for e, a in zip(exact_ids, approx_ids))
+    return hits / max(1, sum(int((e >= 0).sum()) for e in exact_ids))
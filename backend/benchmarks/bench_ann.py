@@ -0,0 +1,90 @@
+"""Recall@k, latency and size of the annIndex index types against an exact flat baseline.
+
+Uses clustered synthetic vectors shaped like MiniLM embeddings by default;
+pass --embed to embed the synthetic review corpus with the real model. Run
+from the backend directory:
+    python benchmarks/bench_ann.py --vectors 100000
+    python benchmarks/bench_ann.py --vectors 100000 --nprobe 4 8 16 32
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import faiss
+import annIndex
+from benchmarks.corpus import synthetic_review_texts
+
+DIM = 384
+
+
+def synthetic_vectors(n, dim=DIM, clusters=200, seed=0):
+    """Unit vectors scattered around topic centroids, like sentence embeddings of reviews."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def embedded_vectors(n):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    model = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')
+    return np.asarray(model.embed_documents(synthetic_review_texts(n)), dtype=np.float32)
+
+
+def index_bytes(index):
+    return faiss.serialize_index(index).nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=40)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[annIndex.IVF_NPROBE])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[annIndex.HNSW_EF_SEARCH])
+    parser.add_argument("--embed", action="store_true")
+    args = parser.parse_args()
+
+    data = embedded_vectors(args.vectors + args.queries) if args.embed else synthetic_vectors(args.vectors + args.queries)
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+    dim = vectors.shape[1]
+    print(f"{len(vectors):,} vectors, {len(queries)} queries, dim {dim}, k={args.k}\n")
+
+    exact = annIndex.build_index(vectors, "Flat")
+    _, exact_ids = exact.search(queries, args.k)
+
+    descriptions = [annIndex.factory_string(len(vectors), dim, kind, quantization, threshold=0)
+                    for kind, quantization in [("ivf", "none"), ("ivf", "sq8"), ("ivf", "pq"),
+                                               ("hnsw", "none"), ("hnsw", "sq8")]]
+
+    print(f"{'index':<22} {'param':>12} {'build s':>8} {'MB':>8} {'ms/query':>9} {'recall@k':>9}")
+    for description in ["Flat"] + descriptions:
+        start = time.perf_counter()
+        index = exact if description == "Flat" else annIndex.build_index(vectors, description)
+        build_time = time.perf_counter() - start
+        size = index_bytes(index) / 1024 ** 2
+
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            settings = [("nprobe", p, lambda p: setattr(ivf, "nprobe", p)) for p in args.nprobe]
+        elif hasattr(index, "hnsw"):
+            settings = [("efSearch", e, lambda e: setattr(index.hnsw, "efSearch", e)) for e in args.ef_search]
+        else:
+            settings = [("-", "", lambda _: None)]
+
+        for name, value, apply in settings:
+            apply(value)
+            start = time.perf_counter()
+            _, ids = index.search(queries, args.k)
+            latency = (time.perf_counter() - start) * 1000 / len(queries)
+            recall = annIndex.recall_at_k(exact_ids, ids)
+            label = f"{name}={value}" if value != "" else "-"
+            print(f"{description:<22} {label:>12} {build_time:>8.2f} {size:>8.1f} {latency:>9.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
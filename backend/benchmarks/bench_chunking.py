@@ -0,0 +1,66 @@
+"""Vectors per review and ingest time of the 50-character splitter vs review-level chunking.
+
+Run from the backend directory:
+    python benchmarks/bench_chunking.py --reviews 5000
+    python benchmarks/bench_chunking.py --reviews 5000 --skip-embedding   # chunk counts only
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from transformers import AutoTokenizer
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import reviewChunker
+from textPreprocessor import clean_text
+from benchmarks.corpus import synthetic_reviews
+
+MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+
+def legacy_split(texts):
+    # The splitter bot.create_db_from_reviews used before reviewChunker
+    return RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=8).create_documents(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--skip-embedding", action="store_true")
+    args = parser.parse_args()
+
+    reviews = synthetic_reviews(args.reviews, duplicate_rate=0)
+    texts = [clean_text(review['Description']) for review in reviews]
+    metadatas = [{'rating': review['Rating'], 'date': review['Date']} for review in reviews]
+    tokenizer = AutoTokenizer.from_pretrained(MODEL)
+    print(f"Corpus: {len(texts):,} synthetic reviews\n")
+
+    strategies = [
+        ("50-char splitter", lambda: legacy_split(texts)),
+        (f"review chunks ({reviewChunker.CHUNK_TOKENS} tok)",
+         lambda: reviewChunker.chunk_reviews(texts, tokenizer, metadatas)),
+    ]
+
+    embeddings = None
+    if not args.skip_embedding:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=MODEL)
+        embeddings.embed_documents(["warmup"])
+
+    print(f"{'strategy':<28} {'vectors':>9} {'per review':>11} {'chunk s':>9} {'embed s':>9}")
+    for label, split in strategies:
+        start = time.perf_counter()
+        docs = split()
+        chunk_time = time.perf_counter() - start
+        embed_time = float('nan')
+        if embeddings is not None:
+            start = time.perf_counter()
+            embeddings.embed_documents([doc.page_content for doc in docs])
+            embed_time = time.perf_counter() - start
+        print(f"{label:<28} {len(docs):>9,} {len(docs) / len(texts):>11.2f} {chunk_time:>9.2f} {embed_time:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Reviews/sec of the original preprocessing code vs textPreprocessor.
+
+Needs the NLTK stopwords and wordnet corpora. Run from the backend directory:
+    python benchmarks/bench_preprocessing.py --reviews 50000 --processes 4
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+import textPreprocessor
+from benchmarks.corpus import synthetic_review_texts
+
+
+# The implementation from reviewExtractor before textPreprocessor, kept verbatim as the baseline
+def legacy_clean_text(text):
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'READ MORE', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'[^a-zA-Z0-9\s.,!?]', '', text)
+    text = ' '.join(text.split())
+    return text.strip()
+
+
+def legacy_remove_stopwords(text):
+    stop_words = set(stopwords.words('english'))
+    return ' '.join(word for word in text.split() if word.lower() not in stop_words)
+
+
+def legacy_lemmatize_text(text):
+    lemmatizer = WordNetLemmatizer()
+    return ' '.join(lemmatizer.lemmatize(word) for word in text.split())
+
+
+def legacy_preprocess_reviews(reviews):
+    processed_reviews = []
+    for review in reviews:
+        cleaned = legacy_clean_text(review)
+        processed_review = legacy_lemmatize_text(legacy_remove_stopwords(cleaned))
+        if len(processed_review.split()) >= 3:
+            processed_reviews.append(processed_review)
+    return processed_reviews
+
+
+def timed(label, fn, reviews):
+    start = time.perf_counter()
+    result = fn(reviews)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f} s  {len(reviews) / elapsed:12,.0f} reviews/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=50000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    nltk.download('stopwords', quiet=True)
+    nltk.download('wordnet', quiet=True)
+    reviews = synthetic_review_texts(args.reviews)
+    print(f"Corpus: {len(reviews):,} synthetic reviews\n")
+
+    # Load WordNet outside the timings so neither side pays for the corpus load
+    WordNetLemmatizer().lemmatize("warmup")
+
+    baseline = timed("original", legacy_preprocess_reviews, reviews)
+    textPreprocessor.lemmatize_word.cache_clear()
+    fast = timed("textPreprocessor (1 proc)", lambda r: textPreprocessor.preprocess_reviews(r, processes=1), reviews)
+    # Force the pool even below PARALLEL_THRESHOLD, to show what it costs at this size
+    textPreprocessor.PARALLEL_THRESHOLD = 0
+    pooled = timed(f"textPreprocessor ({args.processes} procs)",
+                   lambda r: textPreprocessor.preprocess_reviews(r, processes=args.processes), reviews)
+
+    assert baseline == fast == pooled, "preprocessing output changed"
+    print("\nOutputs identical across implementations.")
+
+
+if __name__ == "__main__":
+    main()
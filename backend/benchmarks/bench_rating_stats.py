@@ -0,0 +1,89 @@
+"""Latency of reviewStats columnar rating analytics vs the same statistics over review dicts.
+
+Run from the backend directory:
+    python benchmarks/bench_rating_stats.py --reviews 1000 10000 100000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import reviewStats
+from benchmarks.corpus import synthetic_reviews
+
+
+def metadatas(n):
+    # The fields reviewExtractor.review_metadata keeps, with unique fingerprints
+    return [{
+        'rating': review['Rating'],
+        'date': review['Date'],
+        'certified_buyer': review['Certified_Buyer'],
+        'helpful_votes': review['Helpful_Votes'],
+        'fingerprint': f"{i:016x}",
+    } for i, review in enumerate(synthetic_reviews(n, duplicate_rate=0))]
+
+
+def dict_analytics(records):
+    """The same statistics computed per review in Python, as a baseline."""
+    histogram = [0] * 5
+    total = weighted = weight = certified_total = certified_count = 0
+    months = defaultdict(lambda: [0, 0])
+    for record in records:
+        rating = int(record['rating'])
+        helpful = int(record['helpful_votes'])
+        histogram[rating - 1] += 1
+        total += rating
+        weighted += rating * (1 + helpful)
+        weight += 1 + helpful
+        if record['certified_buyer'] == 'Yes':
+            certified_total += rating
+            certified_count += 1
+        month = reviewStats.parse_month(record['date'])
+        months[month][0] += 1
+        months[month][1] += rating
+    return histogram, total / len(records), weighted / weight, certified_total / certified_count, months
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'reviews':>8} {'columnar':>12} {'dicts':>12} {'load .npz':>12} {'bytes':>10}")
+    for n in args.reviews:
+        records = metadatas(n)
+        columns = reviewStats.review_columns(records)
+        columnar = best_of(lambda: reviewStats.analytics(columns), args.repeat)
+        dicts = best_of(lambda: dict_analytics(records), max(1, args.repeat // 10))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ratings.npz")
+            np.savez(path, **columns)
+            size = os.path.getsize(path)
+
+            def load():
+                with np.load(path) as stored:
+                    return {name: stored[name] for name in stored.files}
+
+            loading = best_of(load, args.repeat)
+
+        print(f"{n:>8} {columnar * 1e6:>10.0f}us {dicts * 1e6:>10.0f}us {loading * 1e6:>10.0f}us {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Synthetic Flipkart-style review corpus shared by the benchmarks."""
+import random
+
+ASPECTS = ["battery", "camera", "display", "performance", "speaker", "charging", "design",
+           "build quality", "software", "heating", "fingerprint sensor", "network", "price"]
+POSITIVE = ["is excellent", "works really well", "is the best in this segment", "exceeded my expectations",
+            "is very good for the price", "is smooth and fast", "lasts the whole day"]
+NEGATIVE = ["is disappointing", "stopped working after a week", "drains too quickly", "is average at best",
+            "gets very hot while gaming", "is not worth the money", "has a lot of lag"]
+FILLERS = ["I have been using this phone for two months.", "Delivery was quick and the packaging was good.",
+           "Overall I am happy with the purchase.", "Would not recommend it to my friends.",
+           "Bought it during the sale.", "Customer support did not help at all."]
+BOILERPLATE = ["Nice product", "Good", "Awesome!!", "Value for money", "Worst product ever", "Very nice phone"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def synthetic_review_text(rng):
+    sentences = []
+    for _ in range(rng.randint(1, 4)):
+        aspect = rng.choice(ASPECTS)
+        opinion = rng.choice(POSITIVE if rng.random() < 0.65 else NEGATIVE)
+        sentences.append(f"The {aspect} {opinion}.")
+    if rng.random() < 0.6:
+        sentences.append(rng.choice(FILLERS))
+    rng.shuffle(sentences)
+    text = " ".join(sentences)
+    if rng.random() < 0.3:
+        text = f"<br/>{text} 👍 READ MORE"
+    return text
+
+
+def synthetic_reviews(n, seed=0, duplicate_rate=0.15, boilerplate_rate=0.1):
+    """Raw review dicts shaped like get_reviews_from_page output, with repeats and boilerplate."""
+    rng = random.Random(seed)
+    reviews = []
+    for i in range(n):
+        if reviews and rng.random() < duplicate_rate:
+            # Flipkart repeats reviews across colour and storage variants
+            reviews.append(dict(rng.choice(reviews)))
+            continue
+        description = rng.choice(BOILERPLATE) if rng.random() < boilerplate_rate else synthetic_review_text(rng)
+        reviews.append({
+            'Name': f"Customer {i}",
+            'Rating': str(rng.choices([1, 2, 3, 4, 5], weights=[8, 5, 10, 30, 47])[0]),
+            'Title': rng.choice(["Wonderful", "Terrific purchase", "Not recommended at all", "Fair", "Just okay"]),
+            'Description': description,
+            'Date': f"{rng.choice(MONTHS)}, {rng.randint(2021, 2024)}",
+            'Certified_Buyer': 'Yes' if rng.random() < 0.8 else 'No',
+            'Helpful_Votes': str(int(rng.expovariate(0.2))),
+        })
+    return reviews
+
+
+def synthetic_review_texts(n, seed=0):
+    return [review['Description'] for review in synthetic_reviews(n, seed)]
@@ -0,0 +1,130 @@
+"""OpenAI-compatible stand-in for Groq's chat completions API, for load-testing llmGateway.
+
+Answers after a fixed latency, streams when asked, honours JSON mode, and
+throttles every Nth request with a 429 and a retry-after header. Run from
+the backend directory and point the app at it:
+    python benchmarks/fake_llm_server.py --port 8100 --latency 0.5 --throttle-every 5
+    GROQ_BASE_URL=http://localhost:8100 python benchmarks/fake_llm_server.py --load 40
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = "The battery easily lasts a full day and the display is bright outdoors .".split()
+
+app = FastAPI()
+settings = {"latency": 0.2, "throttle_every": 0, "retry_after": 1.0, "tokens": 40}
+requests_seen = itertools.count(1)
+
+
+def _usage(prompt, completion_tokens):
+    prompt_tokens = len(" ".join(m["content"] for m in prompt).split())
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if settings["throttle_every"] and next(requests_seen) % settings["throttle_every"] == 0:
+        return JSONResponse(status_code=429, headers={"retry-after": str(settings["retry_after"])},
+                            content={"error": {"message": "Rate limit reached", "type": "tokens"}})
+
+    tokens = min(settings["tokens"], body.get("max_tokens") or settings["tokens"])
+    words = [WORDS[i % len(WORDS)] for i in range(tokens)]
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    await asyncio.sleep(settings["latency"])
+
+    if not body.get("stream"):
+        content = " ".join(words)
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps({"summary": content, "overall_rating": 4.2,
+                                  "component_ratings": [{"name": "Battery", "rating": 4.5}]})
+        return {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": _usage(body["messages"], tokens),
+        }
+
+    async def events():
+        for i, word in enumerate(words):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                     "model": body["model"],
+                     "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            if i == len(words) - 1:
+                # Groq reports usage on the last chunk
+                chunk["choices"][0]["finish_reason"] = "stop"
+                chunk["x_groq"] = {"id": completion_id, "usage": _usage(body["messages"], tokens)}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(0.005)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def run_load(calls, background_share):
+    """Fire calls through llmGateway from worker threads and report latency by priority."""
+    from concurrent.futures import ThreadPoolExecutor
+    import llmGateway
+
+    def one(i):
+        # Spread background calls evenly through the arrivals
+        background = int((i + 1) * background_share) > int(i * background_share)
+        priority = llmGateway.BACKGROUND if background else llmGateway.INTERACTIVE
+        start = time.perf_counter()
+        try:
+            llmGateway.gateway.complete(200, priority, model="fake", max_tokens=100,
+                                        messages=[{"role": "user", "content": f"request {i}"}])
+            ok = True
+        except llmGateway.LLMUnavailable:
+            ok = False
+        return priority, time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=calls) as pool:
+        results = list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - start
+
+    for priority, name in ((llmGateway.INTERACTIVE, "interactive"), (llmGateway.BACKGROUND, "background")):
+        latencies = sorted(seconds for p, seconds, _ in results if p == priority)
+        if latencies:
+            print(f"{name:<12} n={len(latencies):>4}  p50={latencies[len(latencies) // 2]:.2f}s  "
+                  f"max={latencies[-1]:.2f}s")
+    print(f"{sum(ok for *_, ok in results)}/{calls} succeeded in {elapsed:.2f}s")
+    print(llmGateway.gateway.stats())
+    llmGateway.gateway.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=settings["latency"])
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=settings["retry_after"])
+    parser.add_argument("--load", type=int, default=0,
+                        help="instead of serving, send this many calls through llmGateway (uses GROQ_BASE_URL)")
+    parser.add_argument("--background-share", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.load:
+        run_load(args.load, args.background_share)
+        return
+    settings.update(latency=args.latency, throttle_every=args.throttle_every, retry_after=args.retry_after)
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
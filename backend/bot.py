@@ -2,14 +2,25 @@ import os
 import reviewExtractor
 import warnings
 import json
-from transformers import AutoTokenizer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import hashlib
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from dotenv import load_dotenv
-from groq import Groq
 import pickle
 import re
+import time
+import singleflight
+import indexCache
+import indexStore
+import productKeys
+import reviewChunker
+import embeddingService
+import annIndex
+import hybridRetriever
+import promptBuilder
+import responseCache
+import llmGateway
+import reviewStats
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,103 +28,398 @@ load_dotenv()
 # Suppress FutureWarnings related to tokenization
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-# Load your tokenizer
-tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2', clean_up_tokenization_spaces=True)
+# MiniLM tokenizer, shared with the prompt builder
+tokenizer = promptBuilder.tokenizer
 
-# Initialize Groq client
-groq_api_key = os.getenv("GROQCLOUD_API_KEY")
-client = Groq(api_key=groq_api_key)
 
-# Initialize HuggingFaceEmbeddings with the loaded tokenizer
-embeddings = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')
+# MiniLM embeddings behind a persistent content-hash cache, so repeated review text is encoded once
+embeddings = embeddingService.CachedEmbeddings('sentence-transformers/all-MiniLM-L6-v2')
+
+# Concurrent ingestions of the same product in this process share one scrape
+ingestions = singleflight.SingleFlight()
+
+# Loaded indexes, so repeat requests skip disk and unpickling
+index_cache = indexCache.IndexCache(int(os.getenv("INDEX_CACHE_MB", "512")) * 1024 * 1024)
 
 def sanitize_filename(filename):
     sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', filename)
     return sanitized[:100]  # Truncate to 100 characters
 
-def create_db_from_reviews(reviews: list) -> FAISS:
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=8)
-    docs = text_splitter.create_documents(reviews)
-    print("number of docs:", len(docs))
-    db = FAISS.from_documents(docs, embeddings)
+def product_key(product_input):
+    """Filename for the index shared by every spelling or URL of the same product.
+
+    Also keys ingestion deduplication and the index cache.
+    """
+    return productKeys.key_filename(productKeys.resolve(product_input))
+
+def split_reviews(reviews: list, metadatas=None):
+    """One chunk per review, sized in MiniLM tokens, with the review's metadata."""
+    return reviewChunker.chunk_reviews(reviews, tokenizer, metadatas)
+
+def create_db_from_reviews(reviews: list, progress=None, metadatas=None) -> FAISS:
+    docs = split_reviews(reviews, metadatas)
+    print(f"number of docs: {len(docs)} from {len(reviews)} reviews")
+    if not docs:
+        raise ValueError("No reviews left to index after preprocessing.")
+    if progress:
+        progress(stage="embedding")
+    texts = [doc.page_content for doc in docs]
+    vectors = embeddings.embed_documents(texts)
+    if progress:
+        progress(chunks_embedded=len(docs))
+    # Flat below ANN_THRESHOLD vectors, IVF or HNSW above it
+    db = FAISS(embeddings, annIndex.build_index(vectors, add=False), InMemoryDocstore(), {})
+    db.add_embeddings(zip(texts, vectors), metadatas=[doc.metadata for doc in docs])
     return db
 
-def save_db(db, product_name, price, image_url):
-    if not os.path.exists('product_dbs'):
-        os.makedirs('product_dbs')
-    sanitized_name = sanitize_filename(product_name)
-    filename = f"product_dbs/{sanitized_name}_faiss_index.pkl"
-    with open(filename, "wb") as f:
-        pickle.dump({'db': db, 'price': price, 'image_url': image_url}, f)
-
-def load_db(product_name):
-    sanitized_name = sanitize_filename(product_name)
-    filename = f"product_dbs/{sanitized_name}_faiss_index.pkl"
-    with open(filename, "rb") as f:
+def save_db(db, product_name, price, image_url, **metadata):
+    key = product_key(product_name)
+    indexStore.save(key, db, price, image_url, product_input=product_name, **metadata)
+    # The next load maps the new version from disk
+    index_cache.invalidate(key)
+    responseCache.response_cache.invalidate(key)
+
+def legacy_db_path(product_name):
+    return f"product_dbs/{sanitize_filename(product_name)}_faiss_index.pkl"
+
+def has_legacy_db(product_name):
+    """Whether an older release left a pickled index for this product that still needs migrating."""
+    return os.path.exists(legacy_db_path(product_name))
+
+def _migrate_legacy_db(product_name):
+    # The caller holds the product's lock file
+    key = product_key(product_name)
+    if indexStore.exists(key):
+        return
+    with open(legacy_db_path(product_name), "rb") as f:
         data = pickle.load(f)
-        return data['db'], data['price'], data['image_url']
+    save_db(data['db'], product_name, data['price'], data['image_url'])
+    os.remove(legacy_db_path(product_name))
+    print(f"Migrated pickled FAISS database for {product_name} to the native store.")
+
+def migrate_legacy_db(product_name):
+    """Move a pickled index from older releases into the native store."""
+    with singleflight.FileLock(f"product_dbs/{product_key(product_name)}.lock"):
+        _migrate_legacy_db(product_name)
+
+def index_exists(product_input):
+    return (
+        indexStore.exists(product_key(product_input))
+        or os.path.exists(legacy_db_path(product_input))
+    )
+
+def register_url_aliases(product_input):
+    """Point the other keys of a product URL (its pid as well as its item id) at the input's index.
+
+    Only the input's own keys: links found by a name search can be other
+    models or accessories, and aliasing them would serve this index for them.
+    """
+    if not productKeys.is_url(product_input):
+        return
+    target = productKeys.resolve(product_input)
+    for alias in productKeys.url_keys(product_input):
+        if not indexStore.exists(productKeys.key_filename(alias)):
+            productKeys.aliases.add(alias, target)
+
+def load_db(product_name, locked=False):
+    """Load the product's index; raises FileNotFoundError if it has none.
+
+    Pass locked=True when the caller already holds the product's lock file,
+    which flock would otherwise wait on forever.
+    """
+    key = product_key(product_name)
+    if not indexStore.exists(key) and has_legacy_db(product_name):
+        if locked:
+            _migrate_legacy_db(product_name)
+        else:
+            migrate_legacy_db(product_name)
+    version = os.stat(indexStore.manifest_path(key)).st_mtime_ns
+    cached = index_cache.get(key, version)
+    if cached is not None:
+        return cached
+    db, manifest, resident_bytes = indexStore.load(key, embeddings)
+    loaded = (db, manifest['price'], manifest['image_url'])
+    index_cache.put(key, loaded, resident_bytes, version)
+    return loaded
+
+def load_product_details(product_input):
+    """Return (price, image_url) from the index manifest without loading any vectors."""
+    manifest = indexStore.load_manifest(product_key(product_input))
+    return manifest['price'], manifest['image_url']
 
-def get_response_from_query(db, query):
-    docs = db.similarity_search(query, k=150)
-    docs_page_content = " ".join([d.page_content for d in docs])
+def search_reviews(db, query, max_tokens=hybridRetriever.CONTEXT_TOKENS):
+    """Return diverse, relevant review chunks for the query, within max_tokens of context."""
+    # The BM25 index lives as long as the cached store, so it counts against the cache's budget
+    hybridRetriever.bm25_index(db, on_build=lambda index: index_cache.charge(db, index.nbytes))
+    return hybridRetriever.retrieve(db, query, tokenizer, max_tokens)
 
-    prompt = f'''
+QUERY_PROMPT = '''
                 You are an assistant that answers questions based on product reviews. Below are customer reviews about a product.
                 Answer the following question based on the reviews:
                 Question: {query}
-                Here are the reviews: {docs_page_content}
+                Here are the reviews: {context}
                 Provide a concise and specific answer to the question.'''
 
-    completion = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=1.2,
-        max_tokens=1500,
-        top_p=1,
-    )
+INSIGHTS_PROMPT = '''
+                You are an assistant that analyzes product reviews. Below are customer reviews about a {product_name}.
+                Here are the reviews: {context}
+                Return one JSON object and nothing else, in this exact format:
+                {{
+                    "summary": "Markdown summary of the reviews covering 1. **Key Features**: commonly mentioned features, 2. **Problems**: recurring issues, 3. **Rating**: an overall rating out of 5",
+                    "component_ratings": [
+                        {{"name": "Component1", "rating": X.X}},
+                        {{"name": "Component2", "rating": X.X}},
+                        ...
+                    ],
+                    "overall_rating": X.X
+                }}
+                For component_ratings, identify the main components (e.g., camera, battery, performance)
+                and give each an average rating out of 5 based on the reviews.'''
+
+INSIGHTS_PARAMS = {"max_tokens": 1500, "temperature": 0.5, "json_mode": True}
 
-    response = completion.choices[0].message.content.strip()
+# Stored insights from another model, prompt or params are regenerated rather than served
+INSIGHTS_GENERATION = hashlib.sha256(
+    json.dumps([promptBuilder.MODEL, INSIGHTS_PROMPT, INSIGHTS_PARAMS], sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+def get_response_from_query(db, query, docs=None):
+    if docs is None:
+        docs = search_reviews(db, query)
+    prompt, docs = promptBuilder.build_prompt(QUERY_PROMPT, 1500, docs, query=query)
+    response = promptBuilder.complete("answer_query", prompt, max_tokens=1500)
     return response, docs
 
+def stream_response_from_query(db, query, docs=None):
+    """Like get_response_from_query, but yields the answer text as it is generated."""
+    if docs is None:
+        docs = search_reviews(db, query)
+    prompt, _ = promptBuilder.build_prompt(QUERY_PROMPT, 1500, docs, query=query)
+    yield from promptBuilder.stream("answer_query_stream", prompt, max_tokens=1500)
+
+def parse_insights(response_content):
+    """Summary, component ratings and overall rating from the model's JSON reply; None if it is not valid."""
+    try:
+        json_start = response_content.find('{')
+        json_end = response_content.rfind('}') + 1
+        # strict=False lets the Markdown summary keep raw newlines
+        parsed = json.loads(response_content[json_start:json_end], strict=False)
+        summary = str(parsed.get("summary", "")).strip()
+        component_ratings = [
+            {"name": str(item["name"]), "rating": float(item["rating"])}
+            for item in parsed.get("component_ratings", [])
+            if isinstance(item, dict) and "name" in item and "rating" in item
+        ]
+        overall_rating = float(parsed.get("overall_rating") or 0)
+    except Exception as e:
+        print(f"Error parsing product insights: {str(e)}")
+        print(f"Response content: {response_content}")
+        return None
+    return {"summary": summary, "component_ratings": component_ratings, "overall_rating": overall_rating}
+
+def stored_insights(product_input):
+    """Insights materialized for the product's current index, or None if they still need generating."""
+    key = product_key(product_input)
+    return indexStore.load_insights(key, indexStore.load_manifest(key)["version"], INSIGHTS_GENERATION)
+
+def product_insights(db, product_name):
+    """Summary and component ratings from one retrieval and one LLM call, stored alongside the index.
+
+    Both the summary and ratings endpoints read this; concurrent callers for
+    the same product share a single generation.
+    """
+    key = product_key(product_name)
+
+    def run():
+        version = indexStore.load_manifest(key)["version"]
+        insights = indexStore.load_insights(key, version, INSIGHTS_GENERATION)
+        if insights is not None:
+            return insights
+        docs = search_reviews(db, product_name)
+        prompt, _ = promptBuilder.build_prompt(INSIGHTS_PROMPT, INSIGHTS_PARAMS["max_tokens"], docs,
+                                               product_name=product_name)
+        response_content = promptBuilder.complete("product_insights", prompt, cache_for=(key, version),
+                                                  priority=llmGateway.BACKGROUND, **INSIGHTS_PARAMS)
+        insights = parse_insights(response_content)
+        if insights is None:
+            # Don't serve the unparsable reply from the response cache either
+            responseCache.response_cache.invalidate(key)
+            # Not stored, so the next view asks again; show whatever text came back meanwhile
+            return {"summary": response_content.strip(), "component_ratings": [], "overall_rating": 0}
+        return indexStore.save_insights(key, version, INSIGHTS_GENERATION, insights)
+
+    return ingestions.do(f"insights:{key}", run)
+
 def get_product_summary(db, product_name):
-    docs = db.similarity_search(product_name, k=150)
-    docs_page_content = " ".join([d.page_content for d in docs])
-
-    prompt = f'''
-                You are an assistant that summarizes product reviews. Below are customer reviews about a product.
-                Summarize the reviews focusing on:
-                1. **Key Features**: Highlight commonly mentioned features.
-                2. **Problems**: List recurring issues.
-                3. **Rating**: Provide an overall rating out of 5.
-                Here are the reviews: {docs_page_content}
-                Provide the summary and rating now.'''
-
-    completion = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=1.2,
-        max_tokens=1500,
-        top_p=1,
-    )
+    return product_insights(db, product_name)["summary"]
+
+def ingest_product(product_input, extract, progress=None):
+    """Scrape and index a product once, even when several callers ask for it at the same time.
+
+    Callers in this process wait on a single-flight entry, and a lock file
+    serializes ingestion across worker processes.
+    """
+    key = product_key(product_input)
+
+    def run():
+        with singleflight.FileLock(f"product_dbs/{key}.lock"):
+            # Another worker may have finished this product while we waited for the lock
+            try:
+                db, price, image_url = load_db(product_input, locked=True)
+                print(f"FAISS database for {product_input} was created by another worker.")
+                return db, price, image_url
+            except FileNotFoundError:
+                pass
+
+            result = extract(product_input, progress=progress)
+            if not isinstance(result, dict):
+                raise ValueError(f"No reviews found for {product_input}.")
+
+            # Use processed reviews directly
+            db = create_db_from_reviews(result['processed_reviews'], progress, result.get('review_metadata'))
+            if progress:
+                progress(stage="saving")
+            save_db(db, product_input, result['price'], result['image_url'],
+                    fingerprints=result.get('fingerprints'), links=result.get('links', []),
+                    fingerprint_version=reviewExtractor.FINGERPRINT_VERSION,
+                    dedup=result.get('dedup'), last_refreshed=time.time())
+            record_ratings(product_input, result.get('raw_reviews', []))
+            register_url_aliases(product_input)
+            print(f"New database created and saved for {product_input}.")
+            return db, result['price'], result['image_url']
+
+    return ingestions.do(key, run)
+
+def refresh_db(product_input, progress=None, min_age=None):
+    """Append reviews posted since the last scrape to an existing index.
+
+    Pages are read newest-first and each link stops at the first page with no
+    unseen reviews, so only new reviews are fetched and embedded. With min_age
+    (seconds), an index refreshed more recently than that is left alone.
+    """
+    key = product_key(product_input)
+    if not indexStore.exists(key) and has_legacy_db(product_input):
+        migrate_legacy_db(product_input)
+
+    def run():
+        with singleflight.FileLock(f"product_dbs/{key}.lock"):
+            manifest = indexStore.load_manifest(key)
+            last_refreshed = manifest.get('last_refreshed', manifest.get('created_at', 0))
+            if min_age is not None and time.time() - last_refreshed < min_age:
+                return load_db(product_input, locked=True)
+
+            known = indexStore.load_fingerprints(key)
+            if manifest.get('fingerprint_version') != reviewExtractor.FINGERPRINT_VERSION:
+                known = set()
+            if not known:
+                # Indexed before current fingerprints were recorded: nothing to diff against, so rebuild once
+                print(f"No current review fingerprints stored for {product_input}; rebuilding its index.")
+                extract = (reviewExtractor.extractReviewsFromLink if product_input.startswith("http")
+                           else reviewExtractor.extractReviews)
+                result = extract(product_input, progress=progress)
+                if not isinstance(result, dict):
+                    raise ValueError(f"No reviews found for {product_input}.")
+                db = create_db_from_reviews(result['processed_reviews'], progress, result.get('review_metadata'))
+                if progress:
+                    progress(stage="saving")
+                save_db(db, product_input, result['price'], result['image_url'],
+                        fingerprints=result['fingerprints'], links=result['links'],
+                        fingerprint_version=reviewExtractor.FINGERPRINT_VERSION,
+                        dedup=result['dedup'], last_refreshed=time.time())
+                record_ratings(product_input, result['raw_reviews'])
+                return load_db(product_input, locked=True)
+
+            links = manifest.get('links')
+            if not links:
+                links = [product_input] if product_input.startswith("http") else reviewExtractor.get_product_links(product_input)
+            result = reviewExtractor.refreshReviews(links, known, progress=progress)
+
+            if not result['raw_reviews']:
+                indexStore.update_manifest(key, last_refreshed=time.time())
+                print(f"No new reviews for {product_input}.")
+                return load_db(product_input, locked=True)
+
+            # Served indexes are mapped read-only; appending needs a copy in memory
+            db, _, _ = indexStore.load(key, embeddings, mmap_vectors=False)
+            docs = split_reviews(result['processed_reviews'], result['review_metadata'])
+            if docs:
+                if progress:
+                    progress(stage="embedding")
+                db.add_documents(docs)
+                if progress:
+                    progress(chunks_embedded=len(docs))
+                if annIndex.needs_upgrade(db.index):
+                    # Positions are kept, so the docstore ids stay valid
+                    db.index = annIndex.upgrade(db.index)
+            if progress:
+                progress(stage="saving")
+            save_db(db, product_input, manifest['price'], manifest['image_url'],
+                    fingerprints=known.union(result['fingerprints']), links=links,
+                    fingerprint_version=reviewExtractor.FINGERPRINT_VERSION,
+                    last_refreshed=time.time())
+            record_ratings(product_input, result['raw_reviews'], append=True)
+            print(f"Added {len(docs)} chunks from {len(result['raw_reviews'])} new reviews to {product_input}.")
+            return load_db(product_input, locked=True)
+
+    return ingestions.do(f"refresh:{key}", run)
 
-    response = completion.choices[0].message.content.strip()
-    return response
+def record_ratings(product_input, raw_reviews, append=False):
+    """Store the rating columns of scraped reviews; append adds them to the product's existing columns."""
+    key = product_key(product_input)
+    columns = reviewStats.review_columns([reviewExtractor.review_metadata(review) for review in raw_reviews])
+    if append:
+        try:
+            columns = reviewStats.merge_columns(indexStore.load_ratings(key), columns)
+        except FileNotFoundError:
+            # Backfilled from the docstore, new reviews included, on first use
+            return
+    indexStore.save_ratings(key, columns)
 
-def get_or_create_db(product_name):
+def backfill_ratings(product_input):
+    """Rating columns for a store indexed before they were recorded, from its chunk metadata."""
+    key = product_key(product_input)
+    db, _, _ = load_db(product_input)
+    metadatas = [db.docstore.search(db.index_to_docstore_id[i]).metadata for i in range(db.index.ntotal)]
+    scraped_at = indexStore.load_manifest(key).get('created_at')
+    indexStore.save_ratings(key, reviewStats.review_columns(metadatas, scraped_at))
+    print(f"Backfilled rating columns for {product_input} from {len(metadatas)} chunks.")
+
+def rating_analytics(product_input):
+    """Histogram, means and monthly trend of the product's star ratings, computed locally without the LLM."""
+    key = product_key(product_input)
+    if not indexStore.exists(key) and has_legacy_db(product_input):
+        migrate_legacy_db(product_input)
+    version = indexStore.ratings_version(key)
+    if version is None:
+        backfill_ratings(product_input)
+        version = indexStore.ratings_version(key)
+    columns = reviewStats.columns_cache.get(key, version)
+    if columns is None:
+        columns = indexStore.load_ratings(key)
+        reviewStats.columns_cache.put(key, version, columns)
+    return reviewStats.analytics(columns)
+
+def stale_products(max_age):
+    """Inputs of indexed products not refreshed within max_age seconds."""
+    now = time.time()
+    stale = []
+    for key in indexStore.list_keys():
+        try:
+            manifest = indexStore.load_manifest(key)
+        except (FileNotFoundError, ValueError):
+            continue
+        last_refreshed = manifest.get('last_refreshed', manifest.get('created_at', 0))
+        if manifest.get('product_input') and now - last_refreshed >= max_age:
+            stale.append(manifest['product_input'])
+    return stale
+
+def get_or_create_db(product_name, progress=None):
     try:
         db, price, image_url = load_db(product_name)
         print(f"Loaded existing FAISS database for {product_name}.")
     except FileNotFoundError:
         print(f"No existing database found for {product_name}. Creating new database from reviews.")
-        result = reviewExtractor.extractReviews(product_name)
-        
-        # Use processed reviews directly
-        db = create_db_from_reviews(result['processed_reviews'])
-        save_db(db, product_name, result['price'], result['image_url'])
-        
-        price = result['price']
-        image_url = result['image_url']
-        print(f"New database created and saved for {product_name}.")
+        db, price, image_url = ingest_product(product_name, reviewExtractor.extractReviews, progress)
     
     return db, price, image_url
 
@@ -135,75 +441,30 @@ def extract_product_name_from_url(url):
     except:
         return url
 
-def get_or_create_db_from_link(product_link):
+def get_or_create_db_from_link(product_link, progress=None):
     try:
         db, price, image_url = load_db(product_link)
         print(f"Loaded existing FAISS database for {product_link}.")
     except FileNotFoundError:
         print(f"No existing database found for {product_link}. Creating new database from reviews.")
-        result = reviewExtractor.extractReviewsFromLink(product_link)
-        
-        # Use processed reviews directly
-        db = create_db_from_reviews(result['processed_reviews'])
-        save_db(db, product_link, result['price'], result['image_url'])
-        
-        price = result['price']
-        image_url = result['image_url']
-        print(f"New database created and saved for {product_link}.")
+        db, price, image_url = ingest_product(product_link, reviewExtractor.extractReviewsFromLink, progress)
     
     return db, price, image_url
 
-def extract_component_ratings(db, product_name):
+def get_or_create_db_for_input(product_input, progress=None):
+    """Dispatch to link or name ingestion depending on the user input."""
+    if product_input.startswith("http"):
+        return get_or_create_db_from_link(product_input, progress)
+    return get_or_create_db(product_input, progress)
+
+def extract_component_ratings(db, product_name, insights=None):
     """Extract ratings for different components from product reviews."""
-    # Get relevant reviews
-    docs = db.similarity_search(product_name, k=150)
-    docs_content = " ".join([d.page_content for d in docs])
-    
-    prompt = f'''
-    Analyze these product reviews and extract ratings for different components.
-    For a {product_name}, identify the main components (e.g., camera, battery, performance)
-    and provide an average rating out of 5 for each component based on the reviews.
-    
-    Reviews: {docs_content}
-    
-    Return the results in this exact format:
-    {{
-        "component_ratings": [
-            {{"name": "Component1", "rating": X.X}},
-            {{"name": "Component2", "rating": X.X}},
-            ...
-        ],
-        "overall_rating": X.X
-    }}
-    '''
-    
-    completion = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.5,
-        max_tokens=1000,
-        top_p=1,
-    )
-    
-    try:
-        # Log the response content for debugging
-        response_content = completion.choices[0].message.content.strip()
-        print(f"Response content: {response_content}")
-        
-        # Extract the JSON part from the response content
-        json_start = response_content.find('{')
-        json_end = response_content.rfind('}') + 1
-        json_content = response_content[json_start:json_end]
-        
-        # Parse the JSON content and return it
-        response = json.loads(json_content)
-        return response
-    except Exception as e:
-        print(f"Error parsing component ratings: {str(e)}")
-        return {
-            "component_ratings": [],
-            "overall_rating": 0
-        }
+    if insights is None:
+        insights = product_insights(db, product_name)
+    # Measured from the scraped star ratings where available, rather than the model's estimate
+    measured = rating_analytics(product_name)["mean"]
+    overall_rating = measured if measured is not None else insights["overall_rating"]
+    return {"component_ratings": insights["component_ratings"], "overall_rating": overall_rating}
 
 def handle_user_queries(db):
     while True:
@@ -0,0 +1,153 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+def chrome_options():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920x1080")
+    options.add_argument("--disable-features=NetworkService")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-extensions")
+    options.add_argument(f"user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.111 Safari/537.36")
+    return options
+
+
+class _Browser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class BrowserPool:
+    """Pool of warm headless Chrome sessions with a cap on concurrent browsers.
+
+    Browsers are health-checked when checked out and recycled after max_uses
+    pages, so a leaking or crashed Chrome never stays in the pool for long.
+    """
+
+    def __init__(self, max_browsers=2, max_uses=20, page_load_timeout=30):
+        self.max_browsers = max_browsers
+        self.max_uses = max_uses
+        self.page_load_timeout = page_load_timeout
+        self._slots = threading.BoundedSemaphore(max_browsers)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        # Separate from _lock, which stats() takes, because resolving may download the driver
+        self._driver_lock = threading.Lock()
+        self._driver_path = None
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.unhealthy = 0
+
+    def driver_path(self):
+        """Resolve the chromedriver binary once per process."""
+        with self._driver_lock:
+            if self._driver_path is None:
+                self._driver_path = os.getenv("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+                print(f"Using chromedriver at {self._driver_path}")
+            return self._driver_path
+
+    def _create(self):
+        driver = webdriver.Chrome(service=Service(self.driver_path()), options=chrome_options())
+        driver.set_page_load_timeout(self.page_load_timeout)
+        with self._lock:
+            self.created += 1
+        print("Chrome WebDriver initialized successfully")
+        return _Browser(driver)
+
+    def _healthy(self, browser):
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+            print("Chrome WebDriver closed successfully")
+        except Exception as e:
+            print(f"Error closing driver: {str(e)}")
+
+    def _checkout(self):
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create()
+            if self._healthy(browser):
+                with self._lock:
+                    self.reused += 1
+                return browser
+            with self._lock:
+                self.unhealthy += 1
+            self._quit(browser)
+
+    @contextmanager
+    def session(self):
+        """Check out a browser, waiting while max_browsers are already in use."""
+        self._slots.acquire()
+        browser = None
+        try:
+            browser = self._checkout()
+            browser.uses += 1
+            yield browser.driver
+        finally:
+            if browser is not None:
+                if browser.uses >= self.max_uses:
+                    with self._lock:
+                        self.recycled += 1
+                    self._quit(browser)
+                else:
+                    self._idle.put(browser)
+            self._slots.release()
+
+    def warm(self, count=1):
+        """Resolve the driver and start browsers ahead of the first search."""
+        self.driver_path()
+        browsers = []
+        for _ in range(min(count, self.max_browsers)):
+            self._slots.acquire()
+            try:
+                browsers.append(self._create())
+            except Exception as e:
+                print(f"Error warming browser pool: {str(e)}")
+                self._slots.release()
+                break
+        for browser in browsers:
+            self._idle.put(browser)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_browsers": self.max_browsers,
+                "idle": self._idle.qsize(),
+                "created": self.created,
+                "reused": self.reused,
+                "recycled": self.recycled,
+                "unhealthy": self.unhealthy,
+            }
+
+
+browser_pool = BrowserPool(
+    max_browsers=int(os.getenv("BROWSER_POOL_SIZE", "2")),
+    max_uses=int(os.getenv("BROWSER_MAX_USES", "20")),
+)
@@ -0,0 +1,129 @@
+import os
+import re
+import time
+import asyncio
+from collections import OrderedDict
+import executors
+import features
+
+# Wait this long after a keystroke before generating, so a burst of edits costs one call
+DEBOUNCE_SECONDS = float(os.getenv("DRAFT_DEBOUNCE_MS", "700")) / 1000
+SESSION_TTL_SECONDS = int(os.getenv("DRAFT_SESSION_TTL_MINUTES", "30")) * 60
+RESULTS_PER_SESSION = 8
+
+PUNCTUATION_RE = re.compile(r'[\W_]+')
+
+
+def draft_key(text):
+    """Drafts that differ only in whitespace or punctuation share a result."""
+    return PUNCTUATION_RE.sub(' ', text).strip()
+
+
+class _Session:
+    def __init__(self):
+        self.seq = 0
+        self.results = OrderedDict()
+        self.inflight = None
+        self.inflight_key = None
+        self.last_seen = time.monotonic()
+
+
+class DraftCoalescer:
+    """Per-session debounce, cancellation and reuse for completion-plus-feedback on drafts.
+
+    Runs on the event loop: only the newest draft of a session that stays
+    unchanged for DEBOUNCE_SECONDS reaches the LLM, and a generation for a
+    draft the user has since edited is cancelled.
+    """
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self._sessions = {}
+        self.submissions = 0
+        self.superseded = 0
+        self.reused = 0
+        self.generations = 0
+        self.cancelled = 0
+
+    def _session(self, session_id):
+        now = time.monotonic()
+        for sid in [sid for sid, s in self._sessions.items()
+                    if now - s.last_seen > SESSION_TTL_SECONDS and s.inflight is None]:
+            del self._sessions[sid]
+        session = self._sessions.setdefault(session_id, _Session())
+        session.last_seen = now
+        return session
+
+    async def _generate(self, text):
+        parts = []
+        async for token in executors.llm_pool.stream(features.stream_draft_assist, text):
+            parts.append(token)
+        completion, feedback = features.parse_draft_assist("".join(parts))
+        return {"completion": completion, "feedback": feedback}
+
+    def _cancel_inflight(self, session):
+        if session.inflight is not None and not session.inflight.done():
+            session.inflight.cancel()
+            self.cancelled += 1
+        session.inflight = session.inflight_key = None
+
+    async def submit(self, session_id, text):
+        """Return {"status", "completion", "feedback"} for the draft, or status "superseded"."""
+        self.submissions += 1
+        session = self._session(session_id)
+        session.seq += 1
+        seq = session.seq
+        key = draft_key(text)
+
+        if key in session.results:
+            self.reused += 1
+            session.results.move_to_end(key)
+            return {"status": "cached", **session.results[key]}
+        # The draft moved on; stop paying for the old one
+        if session.inflight_key is not None and session.inflight_key != key:
+            self._cancel_inflight(session)
+
+        await asyncio.sleep(self.debounce)
+        if session.seq != seq:
+            self.superseded += 1
+            return {"status": "superseded"}
+
+        if key in session.results:
+            self.reused += 1
+            return {"status": "cached", **session.results[key]}
+        if session.inflight is None or session.inflight_key != key:
+            self._cancel_inflight(session)
+            session.inflight = asyncio.ensure_future(self._generate(text))
+            session.inflight_key = key
+            self.generations += 1
+        task = session.inflight
+
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # This request itself went away; let the generation finish for the next one
+                raise
+            self.superseded += 1
+            return {"status": "superseded"}
+        finally:
+            if session.inflight is task and task.done():
+                session.inflight = session.inflight_key = None
+
+        session.results[key] = result
+        while len(session.results) > RESULTS_PER_SESSION:
+            session.results.popitem(last=False)
+        return {"status": "done", **result}
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "submissions": self.submissions,
+            "superseded": self.superseded,
+            "reused": self.reused,
+            "generations": self.generations,
+            "cancelled": self.cancelled,
+        }
+
+
+draft_coalescer = DraftCoalescer()
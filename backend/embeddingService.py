@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+from singleflight import FileLock
+
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("product_dbs", "embedding_cache"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Torch intra-op threads for encoding (0 = torch default, one per core)
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+
+DIGEST_SIZE = 16
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+class VectorCache:
+    """Persistent content hash -> float32 vector cache, shared by every worker process.
+
+    Two append-only files hold row i of the cache: hashes.bin (16-byte digests)
+    and vectors.f32 (dim float32s), read through a memory map. Vectors are
+    appended before their hashes, so a hash on disk always has its vector.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.dim = None
+        self._rows = {}
+        self._n = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        self._hashes_path = os.path.join(directory, "hashes.bin")
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._meta_path = os.path.join(directory, "meta.json")
+
+    def _sync(self):
+        """Pick up rows appended since the last call, by this or another process."""
+        if self.dim is None:
+            try:
+                with open(self._meta_path) as f:
+                    self.dim = json.load(f)["dim"]
+            except FileNotFoundError:
+                return
+        try:
+            vector_rows = os.path.getsize(self._vectors_path) // (4 * self.dim)
+            with open(self._hashes_path, "rb") as f:
+                f.seek(self._n * DIGEST_SIZE)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        n = min(self._n + len(data) // DIGEST_SIZE, vector_rows)
+        if n == self._n:
+            return
+        for row in range(self._n, n):
+            offset = (row - self._n) * DIGEST_SIZE
+            self._rows.setdefault(data[offset:offset + DIGEST_SIZE], row)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        self._n = n
+
+    def get_many(self, digests):
+        """Return {digest: vector} for the digests that are cached."""
+        with self._lock:
+            if any(digest not in self._rows for digest in digests):
+                self._sync()
+            return {digest: np.array(self._vectors[self._rows[digest]])
+                    for digest in digests if digest in self._rows}
+
+    def put_many(self, digests, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, FileLock(os.path.join(self.directory, "cache.lock")):
+            if self.dim is None:
+                self._sync()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self._meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+            self._sync()
+            new = [i for i, digest in enumerate(digests) if digest not in self._rows]
+            if not new:
+                return
+            # Trim a torn append from a crashed writer so rows stay aligned
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(self._n * 4 * self.dim)
+                f.write(vectors[new].tobytes())
+            with open(self._hashes_path, "ab") as f:
+                f.truncate(self._n * DIGEST_SIZE)
+                f.write(b"".join(digests[i] for i in new))
+            self._sync()
+
+    def __len__(self):
+        return self._n
+
+
+class CachedEmbeddings(Embeddings):
+    """HuggingFace sentence embeddings that never encode the same text twice.
+
+    Document vectors are looked up by content hash in a VectorCache; only
+    misses reach the model, in batches of EMBED_BATCH_SIZE.
+    """
+
+    def __init__(self, model_name, batch_size=EMBED_BATCH_SIZE, threads=EMBED_THREADS, cache_dir=CACHE_DIR):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+        self.cache = VectorCache(os.path.join(cache_dir, re.sub(r'[^a-zA-Z0-9_-]', '_', model_name)))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def _encode(self, texts):
+        start = time.perf_counter()
+        vectors = self.model.embed_documents(texts)
+        with self._lock:
+            self.encoded += len(texts)
+            self.encode_seconds += time.perf_counter() - start
+        return vectors
+
+    def embed_documents(self, texts):
+        digests = [content_hash(text) for text in texts]
+        found = self.cache.get_many(digests)
+
+        # Encode each missing text once, even if it repeats within the batch
+        missing = {}
+        for text, digest in zip(texts, digests):
+            if digest not in found:
+                missing.setdefault(digest, text)
+        if missing:
+            vectors = self._encode(list(missing.values()))
+            self.cache.put_many(list(missing), vectors)
+            found.update(zip(missing, np.asarray(vectors, dtype=np.float32)))
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return [found[digest].tolist() for digest in digests]
+
+    def embed_query(self, text):
+        # Queries rarely repeat verbatim, so they skip the persistent cache
+        return self.model.embed_query(text)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cached_vectors": len(self.cache),
+            "sentences_encoded": self.encoded,
+            "sentences_per_sec": round(self.encoded / self.encode_seconds, 1) if self.encode_seconds else 0.0,
+        }
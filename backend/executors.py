@@ -0,0 +1,143 @@
+import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool's queue is full and a new task is rejected."""
+
+
+class BoundedPool:
+    """Thread pool with a concurrency limit, a bounded queue and usage counters."""
+
+    def __init__(self, name, max_workers, max_queue):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn on the pool and return a concurrent.futures.Future."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated ({self._queued} tasks queued)")
+            self._queued += 1
+        submitted_at = time.monotonic()
+
+        def task():
+            started_at = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_time += started_at - submitted_at
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._run_time += time.monotonic() - started_at
+            return result
+
+        try:
+            return self._executor.submit(task)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn on the pool and await its result from the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stream(self, gen_fn, *args, **kwargs):
+        """Drive the generator gen_fn(*args, **kwargs) on the pool and return an async iterator over it.
+
+        The task is submitted immediately, so PoolSaturated is raised here
+        rather than mid-stream. Closing the iterator early stops the generator
+        after its next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def drain():
+            try:
+                for item in gen_fn(*args, **kwargs):
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+                    if stop.is_set():
+                        break
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+                raise
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        self.submit(drain)
+
+        async def items():
+            try:
+                while True:
+                    item, error = await queue.get()
+                    if item is done:
+                        if error is not None:
+                            raise error
+                        return
+                    yield item
+            finally:
+                stop.set()
+
+        return items()
+
+    def stats(self):
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._wait_time / completed, 4) if completed else 0.0,
+                "avg_run_seconds": round(self._run_time / completed, 4) if completed else 0.0,
+            }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Scraping holds Chrome instances and sleeps between pages, so keep it small.
+scrape_pool = BoundedPool("scrape", int(os.getenv("SCRAPE_WORKERS", "2")), int(os.getenv("SCRAPE_QUEUE", "16")))
+# Embedding and FAISS searches release the GIL for most of their work.
+cpu_pool = BoundedPool("cpu", int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 2))), int(os.getenv("CPU_QUEUE", "64")))
+# LLM calls are network-bound and spend nearly all their time waiting.
+llm_pool = BoundedPool("llm", int(os.getenv("LLM_WORKERS", "16")), int(os.getenv("LLM_QUEUE", "128")))
+
+pools = {pool.name: pool for pool in (scrape_pool, cpu_pool, llm_pool)}
+
+
+def get_stats():
+    """Return queue depth and throughput counters for every pool."""
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def shutdown():
+    for pool in pools.values():
+        pool.shutdown()
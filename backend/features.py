@@ -1,17 +1,10 @@
-import os
-from groq import Groq
-from dotenv import load_dotenv
+import re
+import promptBuilder
 
-# Load environment variables
-load_dotenv()
-
-# Initialize Groq client
-groq_api_key = os.getenv("GROQCLOUD_API_KEY")
-client = Groq(api_key=groq_api_key)
 
 def personalize_review_style(user_preferences):
     try:
-        prompt = f"""
+        template = """
                     You are an assistant that helps write product reviews.Make it short like 80 words.
                     Based on these preferences: {user_preferences}, suggest a personalized review style.
                     Include:
@@ -23,21 +16,13 @@ def personalize_review_style(user_preferences):
                     Provide the review style now.
                     """
         
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=1.2,
-            max_tokens=600,
-            top_p=1,
-        )
-        
-        return completion.choices[0].message.content.strip()
+        prompt, _ = promptBuilder.build_prompt(template, 600, user_preferences=user_preferences)
+        return promptBuilder.complete("personalize_review_style", prompt, max_tokens=600)
     except Exception as e:
         print(f"Error in personalize_review_style: {str(e)}")
         raise  # Re-raise the exception to be caught by the FastAPI error handler
 
-def text_completion(current_text):
-    prompt = f"""
+TEXT_COMPLETION_PROMPT = """
                 You are an assistant that completes product reviews. Make it short like 50 words.
                 Below is a partial review.
                 Complete it by:
@@ -48,19 +33,17 @@ def text_completion(current_text):
                 Here is the partial review: {current_text}
                 Provide the continuation now.
                 """
-    
-    completion = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=1.2,
-        max_tokens=700,
-        top_p=1,
-    )
-    
-    return completion.choices[0].message.content.strip()
 
-def real_time_feedback(review_text):
-    prompt = f"""
+def text_completion(current_text):
+    prompt, _ = promptBuilder.build_prompt(TEXT_COMPLETION_PROMPT, 700, current_text=current_text)
+    return promptBuilder.complete("text_completion", prompt, max_tokens=700)
+
+def stream_text_completion(current_text):
+    """Like text_completion, but yields the continuation as it is generated."""
+    prompt, _ = promptBuilder.build_prompt(TEXT_COMPLETION_PROMPT, 700, current_text=current_text)
+    yield from promptBuilder.stream("text_completion_stream", prompt, max_tokens=700)
+
+FEEDBACK_PROMPT = """
                 You are an assistant that provides feedback on product reviews.Make it short like 60 words.
                 Below is a draft review.
                 Provide feedback on:
@@ -72,19 +55,52 @@ def real_time_feedback(review_text):
                 Here is the draft review: {review_text}
                 Provide feedback now.
                 """
-    
-    completion = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=1.2,
-        max_tokens=850,
-        top_p=1,
-    )
-    
-    return completion.choices[0].message.content.strip()
+
+def real_time_feedback(review_text):
+    prompt, _ = promptBuilder.build_prompt(FEEDBACK_PROMPT, 850, review_text=review_text)
+    return promptBuilder.complete("real_time_feedback", prompt, max_tokens=850)
+
+def stream_real_time_feedback(review_text):
+    """Like real_time_feedback, but yields the feedback as it is generated."""
+    prompt, _ = promptBuilder.build_prompt(FEEDBACK_PROMPT, 850, review_text=review_text)
+    yield from promptBuilder.stream("real_time_feedback_stream", prompt, max_tokens=850)
+
+DRAFT_ASSIST_PROMPT = """
+                You are an assistant that helps customers write product reviews.
+                Below is a draft review. Do two things:
+                1. Under the line COMPLETION:, continue the draft in about 50 words, keeping its tone,
+                   balancing pros and cons and finishing with a strong conclusion.
+                2. Under the line FEEDBACK:, give about 60 words of feedback on clarity, detail,
+                   balance, tone and structure, with final tips.
+                Here is the draft review: {review_text}
+                Answer in exactly this format:
+                COMPLETION:
+                <continuation>
+                FEEDBACK:
+                <feedback>
+                """
+
+DRAFT_SECTION_RE = re.compile(r'^\s*\**\s*(COMPLETION|FEEDBACK)\s*\**\s*:\s*\**\s*', re.MULTILINE | re.IGNORECASE)
+
+def stream_draft_assist(review_text):
+    """Continuation and feedback for a draft in one call, replacing text_completion + real_time_feedback."""
+    prompt, _ = promptBuilder.build_prompt(DRAFT_ASSIST_PROMPT, 600, review_text=review_text)
+    yield from promptBuilder.stream("draft_assist", prompt, max_tokens=600)
+
+def parse_draft_assist(response):
+    """Split a draft-assist response into (completion, feedback)."""
+    sections = {}
+    matches = list(DRAFT_SECTION_RE.finditer(response))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(response)
+        sections[match.group(1).upper()] = response[match.end():end].strip()
+    if not sections:
+        # The model ignored the format; treat the whole answer as feedback
+        return "", response.strip()
+    return sections.get("COMPLETION", ""), sections.get("FEEDBACK", "")
 
 def generate_review_template(product_name, user_preferences):
-    prompt = f"""
+    template = """
                 You are an assistant that creates product review templates.Make it short like 75 words.
                 Based on the product: {product_name} and these preferences: {user_preferences}, generate a template.
                 Include:
@@ -97,12 +113,5 @@ def generate_review_template(product_name, user_preferences):
                 Provide the template now.
                 """
     
-    completion = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=1.2,
-        max_tokens=500,
-        top_p=1,
-    )
-    
-    return completion.choices[0].message.content.strip()
\ No newline at end of file
+    prompt, _ = promptBuilder.build_prompt(template, 500, product_name=product_name, user_preferences=user_preferences)
+    return promptBuilder.complete("generate_review_template", prompt, max_tokens=500)
\ No newline at end of file
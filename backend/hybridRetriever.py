@@ -0,0 +1,160 @@
+import os
+import re
+import math
+import threading
+import weakref
+from collections import Counter, defaultdict
+import numpy as np
+import singleflight
+
+# Candidates taken from each of the BM25 and vector rankings before fusion
+FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "100"))
+# Review context per prompt, in MiniLM tokens
+CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "1500"))
+# 1 ranks purely on relevance, 0 purely on novelty
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.6"))
+RRF_K = 60
+# Rough per-term cost of the postings dict entry, term string, tuple and two array headers
+TERM_OVERHEAD_BYTES = 400
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over the chunks of one product, in index position order."""
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.n = len(texts)
+        lengths = np.array([len(tokenize(text)) for text in texts], dtype=np.float32)
+        avg_length = float(lengths.mean()) if self.n else 0.0
+        norms = k1 * (1 - b + b * lengths / avg_length) if avg_length else np.full(self.n, k1, dtype=np.float32)
+
+        postings = defaultdict(list)
+        for position, text in enumerate(texts):
+            for term, tf in Counter(tokenize(text)).items():
+                postings[term].append((position, tf))
+
+        # Per term: positions and their precomputed BM25 weights
+        self.postings = {}
+        for term, entries in postings.items():
+            positions = np.array([p for p, _ in entries], dtype=np.int64)
+            tfs = np.array([tf for _, tf in entries], dtype=np.float32)
+            idf = math.log(1 + (self.n - len(entries) + 0.5) / (len(entries) + 0.5))
+            self.postings[term] = (positions, idf * tfs * (k1 + 1) / (tfs + norms[positions]))
+        self.nbytes = sum(positions.nbytes + weights.nbytes for positions, weights in self.postings.values()) \
+            + len(self.postings) * TERM_OVERHEAD_BYTES
+
+    def top(self, query, k):
+        """Positions of the k best-scoring chunks, best first."""
+        scores = np.zeros(self.n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                positions, weights = self.postings[term]
+                scores[positions] += weights
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k)[:k]]
+        return matched[np.argsort(-scores[matched])].tolist()
+
+
+_bm25_indexes = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+# Concurrent first retrievals from the same store share one build
+_builds = singleflight.SingleFlight()
+
+
+def _document(db, position):
+    return db.docstore.search(db.index_to_docstore_id[position])
+
+
+def bm25_index(db, on_build=None):
+    """The BM25 index for a loaded store, built on first use and dropped with the store.
+
+    Builds run outside the module lock, so other stores are not held up.
+    on_build(index) is called once, by the caller that built it.
+    """
+    with _lock:
+        index = _bm25_indexes.get(db)
+    if index is None:
+        index = _builds.do(id(db), _build_bm25_index, db, on_build)
+    return index
+
+
+def _build_bm25_index(db, on_build):
+    with _lock:
+        index = _bm25_indexes.get(db)
+    if index is not None:
+        # Finished by a build that ended just before this one started
+        return index
+    index = BM25Index([_document(db, i).page_content for i in range(db.index.ntotal)])
+    with _lock:
+        _bm25_indexes[db] = index
+    if on_build is not None:
+        on_build(index)
+    return index
+
+
+def reciprocal_rank_fusion(*rankings):
+    """Fuse rankings of positions; returns {position: score}."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            scores[position] += 1.0 / (RRF_K + rank + 1)
+    return scores
+
+
+def _candidate_vectors(db, positions, docs):
+    try:
+        vectors = np.vstack([db.index.reconstruct(int(p)) for p in positions])
+    except RuntimeError:
+        # IVF indexes cannot reconstruct without a direct map; the embedding cache has these texts
+        vectors = np.asarray(db.embedding_function.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def retrieve(db, query, tokenizer, max_tokens=CONTEXT_TOKENS, fetch_k=FETCH_K, lambda_mult=MMR_LAMBDA):
+    """Review chunks for a prompt: BM25 and vector hits fused, diversified with MMR, cut to max_tokens.
+
+    Returns Documents in selection order, most relevant first.
+    """
+    if db.index.ntotal == 0:
+        return []
+    fetch_k = min(fetch_k, db.index.ntotal)
+    query_vector = np.asarray([db.embedding_function.embed_query(query)], dtype=np.float32)
+    _, ids = db.index.search(query_vector, fetch_k)
+    vector_ranking = [int(i) for i in ids[0] if i >= 0]
+    lexical_ranking = bm25_index(db).top(query, fetch_k)
+
+    fused = reciprocal_rank_fusion(vector_ranking, lexical_ranking)
+    positions = sorted(fused, key=fused.get, reverse=True)
+    docs = [_document(db, p) for p in positions]
+    relevance = np.array([fused[p] for p in positions])
+    relevance = relevance / relevance.max()
+    vectors = _candidate_vectors(db, positions, docs)
+    lengths = [len(ids) for ids in tokenizer([d.page_content for d in docs], add_special_tokens=False)['input_ids']]
+
+    selected = []
+    seen = set()
+    used = 0
+    max_similarity = np.zeros(len(docs))
+    remaining = np.ones(len(docs), dtype=bool)
+    while remaining.any():
+        scores = np.where(remaining, lambda_mult * relevance - (1 - lambda_mult) * max_similarity, -np.inf)
+        best = int(np.argmax(scores))
+        remaining[best] = False
+        # Indexes built before dedup can hold the same review several times
+        if used + lengths[best] > max_tokens or docs[best].page_content in seen:
+            continue
+        seen.add(docs[best].page_content)
+        selected.append(docs[best])
+        used += lengths[best]
+        max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+    print(f"Retrieved {len(selected)} of {len(docs)} candidates, {used} context tokens")
+    return selected
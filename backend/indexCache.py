@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+
+class IndexCache:
+    """Process-wide LRU cache of loaded product indexes, bounded by total bytes.
+
+    Each entry remembers the version of the file it was loaded from (its mtime),
+    so an index rewritten by another worker is reloaded instead of served stale.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (version is not None and entry[2] != version):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes, version=None):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                # Larger than the whole budget; caching it would only flush everything else
+                return
+            self._entries[key] = (value, nbytes, version)
+            self._bytes += nbytes
+            self._evict()
+
+    def charge(self, owner, nbytes):
+        """Count nbytes more against the entry holding owner, for memory built over a cached value later.
+
+        owner is the cached value or an item of a cached tuple. Returns False if
+        no entry holds it any more.
+        """
+        with self._lock:
+            for key, (value, size, version) in self._entries.items():
+                if value is owner or (isinstance(value, tuple) and any(item is owner for item in value)):
+                    break
+            else:
+                return False
+            self._entries[key] = (value, size + nbytes, version)
+            self._bytes += nbytes
+            self._evict()
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,311 @@
+import os
+import json
+import mmap
+import time
+import threading
+from collections.abc import Mapping
+import numpy as np
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+import annIndex
+
+# On-disk layout for one product, under product_dbs/<key>/:
+#   manifest.json               small metadata (price, image, counts, current version)
+#   index-<version>.faiss       native FAISS index, memory-mapped when served
+#   docstore-<version>.jsonl    one JSON record per vector, in index order
+#   docstore-<version>.offsets  uint64 byte offset of each record
+#   fingerprints.txt            one line per review already indexed, for incremental refresh
+#   insights.json               summary and component ratings generated from one index version
+#   ratings.npz                 per-review rating, date, certified and helpful columns for analytics
+# The manifest is replaced last, so readers always see a complete version.
+
+STORE_DIR = "product_dbs"
+FORMAT_VERSION = 1
+
+# IO_FLAG_MMAP_IFC also maps flat vector codes; IO_FLAG_MMAP alone only maps IVF lists
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def store_path(key):
+    return os.path.join(STORE_DIR, key)
+
+
+def manifest_path(key):
+    return os.path.join(store_path(key), "manifest.json")
+
+
+def exists(key):
+    return os.path.exists(manifest_path(key))
+
+
+def list_keys():
+    """Keys of every product with a complete store."""
+    try:
+        names = os.listdir(STORE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if exists(name))
+
+
+def load_manifest(key):
+    """Read product metadata without touching the vectors; raises FileNotFoundError."""
+    with open(manifest_path(key)) as f:
+        return json.load(f)
+
+
+def fingerprints_path(key):
+    return os.path.join(store_path(key), "fingerprints.txt")
+
+
+def load_fingerprints(key):
+    """Fingerprints of the reviews already in the index; empty for stores saved before refresh existed."""
+    try:
+        with open(fingerprints_path(key)) as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def insights_path(key):
+    return os.path.join(store_path(key), "insights.json")
+
+
+def load_insights(key, version, generation):
+    """Stored summary and ratings for this index version and generation, or None if missing or stale.
+
+    generation identifies the model, prompt and params the insights came from.
+    """
+    try:
+        with open(insights_path(key)) as f:
+            insights = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if insights.get("index_version") != version or insights.get("generation") != generation:
+        return None
+    return insights
+
+
+def save_insights(key, version, generation, insights):
+    """Store insights generated from an index version. Kept out of the manifest, whose mtime versions the index cache."""
+    record = dict(insights, index_version=version, generation=generation, generated_at=time.time())
+
+    def write_insights(path):
+        with open(path, "w") as f:
+            json.dump(record, f)
+
+    _write_atomic(insights_path(key), write_insights)
+    return record
+
+
+def ratings_path(key):
+    return os.path.join(store_path(key), "ratings.npz")
+
+
+def ratings_version(key):
+    """mtime of the rating columns, or None for stores saved before they existed."""
+    try:
+        return os.stat(ratings_path(key)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_ratings(key):
+    """Rating columns as {name: array}; raises FileNotFoundError."""
+    with np.load(ratings_path(key)) as columns:
+        return {name: columns[name] for name in columns.files}
+
+
+def save_ratings(key, columns):
+    def write_ratings(path):
+        # A file object, so numpy does not append its own .npz suffix to the temp name
+        with open(path, "wb") as f:
+            np.savez(f, **columns)
+
+    _write_atomic(ratings_path(key), write_ratings)
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _files(key, version):
+    directory = store_path(key)
+    return (
+        os.path.join(directory, f"index-{version}.faiss"),
+        os.path.join(directory, f"docstore-{version}.jsonl"),
+        os.path.join(directory, f"docstore-{version}.offsets"),
+    )
+
+
+def save(key, db, price, image_url, fingerprints=None, **metadata):
+    """Persist a LangChain FAISS store in the native format and return its manifest.
+
+    fingerprints, when given, replaces the set of known review fingerprints.
+    """
+    directory = store_path(key)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        previous = load_manifest(key)
+    except FileNotFoundError:
+        previous = None
+
+    version = time.time_ns()
+    index_file, docstore_file, offsets_file = _files(key, version)
+
+    faiss.write_index(db.index, index_file)
+
+    offsets = np.zeros(db.index.ntotal, dtype=np.uint64)
+    with open(docstore_file, "wb") as f:
+        for i in range(db.index.ntotal):
+            doc = db.docstore.search(db.index_to_docstore_id[i])
+            offsets[i] = f.tell()
+            record = {"text": doc.page_content, "metadata": doc.metadata}
+            f.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+            f.write(b"\n")
+    offsets.tofile(offsets_file)
+
+    manifest = dict(previous or {})
+    manifest.update(metadata)
+    manifest.update({
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "price": price,
+        "image_url": image_url,
+        "ntotal": int(db.index.ntotal),
+        "dim": int(db.index.d),
+        "index_type": type(db.index).__name__,
+        "updated_at": time.time(),
+    })
+    manifest.setdefault("created_at", manifest["updated_at"])
+
+    if fingerprints is not None:
+        def write_fingerprints(path):
+            with open(path, "w") as f:
+                f.writelines(f"{fingerprint}\n" for fingerprint in sorted(fingerprints))
+
+        # Written before the manifest, so a crash between the two only re-fetches reviews
+        _write_atomic(fingerprints_path(key), write_fingerprints)
+        manifest["review_count"] = len(fingerprints)
+
+    _write_manifest(key, manifest)
+
+    # Readers that already opened the old files keep their handles on POSIX
+    if previous is not None and previous.get("version") != version:
+        for path in _files(key, previous["version"]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return manifest
+
+
+def _write_manifest(key, manifest):
+    def write_manifest(path):
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+
+    _write_atomic(manifest_path(key), write_manifest)
+
+
+def update_manifest(key, **fields):
+    """Change metadata fields without rewriting the index."""
+    manifest = load_manifest(key)
+    manifest.update(fields)
+    _write_manifest(key, manifest)
+    return manifest
+
+
+class _PositionIds(Mapping):
+    """index_to_docstore_id for a served store, where record ids are index positions."""
+
+    def __init__(self, n):
+        self._n = n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._n:
+            raise KeyError(i)
+        return str(i)
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        return iter(range(self._n))
+
+
+class MmapDocstore(Docstore):
+    """Read-only docstore that decodes only the records a search actually returns."""
+
+    def __init__(self, docstore_file, offsets_file):
+        self._offsets = np.fromfile(offsets_file, dtype=np.uint64)
+        with open(docstore_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._size = size
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def search(self, search):
+        try:
+            i = int(search)
+        except (TypeError, ValueError):
+            return f"ID {search} not found."
+        if not 0 <= i < len(self._offsets):
+            return f"ID {search} not found."
+        start = int(self._offsets[i])
+        end = int(self._offsets[i + 1]) if i + 1 < len(self._offsets) else self._size
+        record = json.loads(self._data[start:end])
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def iter_documents(self):
+        for i in range(len(self._offsets)):
+            yield self.search(str(i))
+
+
+def _read_index(index_file, mmap_vectors):
+    if mmap_vectors:
+        try:
+            return annIndex.set_search_params(faiss.read_index(index_file, MMAP_FLAGS)), True
+        except RuntimeError as e:
+            print(f"Memory-mapped load of {index_file} failed, reading it into memory: {e}")
+    return annIndex.set_search_params(faiss.read_index(index_file)), False
+
+
+def load(key, embeddings, mmap_vectors=True):
+    """Open a stored product; returns (db, manifest, resident_bytes).
+
+    With mmap_vectors the index and docstore are mapped read-only and shared
+    through the OS page cache. Pass mmap_vectors=False to get a mutable store
+    that can be appended to and saved again.
+    """
+    for attempt in range(2):
+        manifest = load_manifest(key)
+        index_file, docstore_file, offsets_file = _files(key, manifest["version"])
+        try:
+            index, mapped = _read_index(index_file, mmap_vectors)
+            if mmap_vectors:
+                docstore = MmapDocstore(docstore_file, offsets_file)
+                db = FAISS(embeddings, index, docstore, _PositionIds(index.ntotal))
+                resident_bytes = os.path.getsize(offsets_file)
+            else:
+                docs = {}
+                with open(docstore_file, encoding="utf-8") as f:
+                    for i, line in enumerate(f):
+                        record = json.loads(line)
+                        docs[str(i)] = Document(page_content=record["text"], metadata=record["metadata"])
+                db = FAISS(embeddings, index, InMemoryDocstore(docs), {i: str(i) for i in range(len(docs))})
+                resident_bytes = os.path.getsize(docstore_file)
+            if not mapped:
+                resident_bytes += os.path.getsize(index_file)
+            return db, manifest, resident_bytes
+        except (FileNotFoundError, RuntimeError):
+            # A concurrent save replaced this version between reading the manifest and the files
+            if attempt == 1:
+                raise
+    raise FileNotFoundError(manifest_path(key))
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import uuid
+import threading
+import executors
+
+# Job snapshots are written here so any worker process can answer a status poll
+JOBS_DIR = os.path.join("product_dbs", "jobs")
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+_lock = threading.Lock()
+_jobs = {}
+_active_by_key = {}
+
+
+class Job:
+    """Status and progress counters for one ingestion run."""
+
+    def __init__(self, product_input, key, kind="ingest"):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.product_input = product_input
+        self.key = key
+        self.status = "queued"
+        self.stage = "queued"
+        self.pages_fetched = 0
+        self.reviews_parsed = 0
+        self.chunks_embedded = 0
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, stage=None, pages_fetched=0, reviews_parsed=0, chunks_embedded=0):
+        """Progress callback handed to the ingestion pipeline; counters are increments."""
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            self.pages_fetched += pages_fetched
+            self.reviews_parsed += reviews_parsed
+            self.chunks_embedded += chunks_embedded
+            self.updated_at = time.time()
+        self._save()
+
+    def _finish(self, status, error=None):
+        with self._lock:
+            self.status = status
+            self.stage = "done" if status == "done" else self.stage
+            self.error = error
+            self.finished_at = self.updated_at = time.time()
+        self._save()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "product_input": self.product_input,
+                "status": self.status,
+                "stage": self.stage,
+                "pages_fetched": self.pages_fetched,
+                "reviews_parsed": self.reviews_parsed,
+                "chunks_embedded": self.chunks_embedded,
+                "error": self.error,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+                "finished_at": self.finished_at,
+            }
+
+    def _save(self):
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        filename = os.path.join(JOBS_DIR, f"{self.id}.json")
+        tmp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_filename, filename)
+
+
+def _run(job, fn):
+    with job._lock:
+        job.status = "running"
+    job.update(stage="starting")
+    try:
+        fn(job.update)
+        job._finish("done")
+    except Exception as e:
+        print(f"Ingestion job {job.id} for {job.product_input} failed: {e}")
+        job._finish("failed", str(e))
+    finally:
+        with _lock:
+            if _active_by_key.get(job.key) is job:
+                del _active_by_key[job.key]
+
+
+def _prune():
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id, job in list(_jobs.items()):
+        if job.finished_at is not None and job.finished_at < cutoff:
+            del _jobs[job_id]
+            try:
+                os.remove(os.path.join(JOBS_DIR, f"{job_id}.json"))
+            except OSError:
+                pass
+
+
+def submit(key, product_input, fn, kind="ingest"):
+    """Queue fn(progress) on the scrape pool, reusing the active job for the same key."""
+    with _lock:
+        _prune()
+        job = _active_by_key.get(key)
+        if job is not None:
+            return job
+        job = Job(product_input, key, kind)
+        # Raises executors.PoolSaturated before the job is registered
+        executors.scrape_pool.submit(_run, job, fn)
+        _jobs[job.id] = job
+        _active_by_key[key] = job
+    job._save()
+    return job
+
+
+def active_job(key):
+    with _lock:
+        return _active_by_key.get(key)
+
+
+def get(job_id):
+    """Return a job snapshot, falling back to jobs started by other worker processes."""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    try:
+        with open(os.path.join(JOBS_DIR, f"{os.path.basename(job_id)}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -1,10 +1,8 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from browserPool import browser_pool
+from searchCache import search_cache
 import time
 import re
 
@@ -14,60 +12,44 @@ def get_product_links(product_name, max_retries=5):
     search_query = f"{product_name} site:flipkart.com"
     url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
 
-    print(f"Searching Google with query: {search_query}")
+    cached_links = search_cache.get(product_name)
+    if cached_links:
+        print(f"Using cached Flipkart links for: {product_name}")
+        return cached_links
 
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920x1080")
-    options.add_argument("--disable-features=NetworkService")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-extensions")
-    options.add_argument(f"user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.111 Safari/537.36")
+    print(f"Searching Google with query: {search_query}")
 
     for attempt in range(max_retries):
-        driver = None
         try:
-            # Initialize ChromeDriver
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=options
-            )
-            
-            # Set page load timeout
-            driver.set_page_load_timeout(30)
-            print("Chrome WebDriver initialized successfully")
-            
-            # Navigate to Google search URL
-            print(f"Navigating to Google search URL: {url}")
-            driver.get(url)
-            time.sleep(5)
+            # Borrow a warm browser from the pool instead of launching Chrome
+            with browser_pool.session() as driver:
+                # Navigate to Google search URL
+                print(f"Navigating to Google search URL: {url}")
+                driver.get(url)
 
-            # Wait for and find search results
-            wait = WebDriverWait(driver, 20)
-            search_results = wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.tF2Cxc"))
-            )
+                # Wait for the search results themselves rather than a fixed delay
+                wait = WebDriverWait(driver, 20)
+                search_results = wait.until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.tF2Cxc"))
+                )
 
-            print(f"Found {len(search_results)} search results")
+                print(f"Found {len(search_results)} search results")
 
-            for result in search_results:
-                try:
-                    link_element = result.find_element(By.CSS_SELECTOR, "a")
-                    link = link_element.get_attribute('href')
+                for result in search_results:
+                    try:
+                        link_element = result.find_element(By.CSS_SELECTOR, "a")
+                        link = link_element.get_attribute('href')
 
-                    # Flipkart URL pattern matching
-                    if re.search(r'flipkart\.com.*?/p/', link) and "google.com" not in link:
-                        links.append(link)
-                        print(f"Found valid Flipkart link: {link}")
-                except Exception as e:
-                    print(f"Error extracting link from result: {str(e)}")
-                    continue
+                        # Flipkart URL pattern matching
+                        if re.search(r'flipkart\.com.*?/p/', link) and "google.com" not in link:
+                            links.append(link)
+                            print(f"Found valid Flipkart link: {link}")
+                    except Exception as e:
+                        print(f"Error extracting link from result: {str(e)}")
+                        continue
 
-                if len(links) >= 5:
-                    break
+                    if len(links) >= 5:
+                        break
 
             if links:
                 break
@@ -78,19 +60,14 @@ def get_product_links(product_name, max_retries=5):
                 print("Failed to fetch product links after maximum retries")
                 return []
             time.sleep(2 * (attempt + 1))
-            
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                    print("Chrome WebDriver closed successfully")
-                except Exception as e:
-                    print(f"Error closing driver: {str(e)}")
 
     print(f"\nTotal Flipkart links found: {len(links)}")
     for i, link in enumerate(links, 1):
         print(f"{i}. {link}")
 
+    if links:
+        search_cache.put(product_name, links)
+
     return links
 
 # Example Usage:
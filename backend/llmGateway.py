@@ -0,0 +1,282 @@
+import os
+import time
+import heapq
+import queue
+import random
+import asyncio
+import itertools
+import threading
+from email.utils import parsedate_to_datetime
+import httpx
+from groq import (AsyncGroq, DefaultAsyncHttpxClient, RateLimitError, APITimeoutError,
+                  APIConnectionError, InternalServerError)
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Point at a local fake server (benchmarks/fake_llm_server.py) for load tests
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+# Provider limits for the model (0 = unlimited); the defaults are Groq's free tier for llama3-70b-8192
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+
+# Lower runs first: users waiting on a reply go ahead of summaries and ratings
+INTERACTIVE = 0
+BACKGROUND = 1
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+class LLMUnavailable(Exception):
+    """The provider kept failing or throttling after every retry."""
+
+
+class _Bucket:
+    """Allowance of requests or tokens per minute, refilled continuously."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute if per_minute > 0 else float("inf")
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.rate:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait(self, amount, now):
+        """Seconds until amount is available."""
+        self._refill(now)
+        if not self.rate or self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        if self.rate:
+            self.level -= amount
+
+    def give(self, amount):
+        if self.rate:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateScheduler:
+    """Admits LLM calls under RPM and TPM budgets, strictly by priority, then arrival.
+
+    Lives on the gateway's event loop. Token costs are reserved up front from
+    an estimate and settled against the usage the provider reports.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._paused_until = 0.0
+
+    async def acquire(self, cost, priority):
+        future = asyncio.get_running_loop().create_future()
+        # A call larger than the whole per-minute budget could never start otherwise
+        heapq.heappush(self._waiters, (priority, next(self._seq), min(cost, self.tokens.capacity), future))
+        self._dispatch()
+        await future
+
+    def waiting(self):
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._waiters:
+            _, _, cost, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self._paused_until - now, self.requests.wait(1, now), self.tokens.wait(cost, now))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(cost)
+            future.set_result(None)
+
+    def settle(self, reserved, actual):
+        """Refund an over-estimate, or charge an under-estimate, once usage is known."""
+        self.tokens.give(reserved - actual)
+
+    def pause(self, seconds):
+        """Hold every call for seconds after the provider throttled us."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._dispatch()
+
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """One pooled async Groq client shared by every LLM call in the process.
+
+    The client, scheduler and retries run on a dedicated event loop thread, so
+    worker threads and the FastAPI loop can both submit calls.
+    """
+
+    def __init__(self, rpm=GROQ_RPM, tpm=GROQ_TPM, max_retries=LLM_MAX_RETRIES, timeout=LLM_TIMEOUT_SECONDS,
+                 base_url=GROQ_BASE_URL, max_connections=LLM_MAX_CONNECTIONS):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.scheduler = RateScheduler(rpm, tpm)
+        self._client = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "rate_limited": 0, "timeouts": 0, "failed": 0, "queue_seconds": 0.0}
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def _get_client(self):
+        # Created on the gateway loop, which owns its connection pool
+        if self._client is None:
+            self._client = AsyncGroq(
+                api_key=os.getenv("GROQCLOUD_API_KEY"),
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+                    max_connections=self.max_connections, max_keepalive_connections=self.max_connections)),
+            )
+        return self._client
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    async def _attempts(self, estimated_tokens, priority, call):
+        """Run call() under the rate limits, retrying throttling, timeouts and 5xx with jittered backoff."""
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            await self.scheduler.acquire(estimated_tokens, priority)
+            self._count("queue_seconds", time.monotonic() - queued_at)
+            self._count("calls")
+            try:
+                return await call()
+            except RETRYABLE_ERRORS as e:
+                retry_after = None
+                if isinstance(e, RateLimitError):
+                    self._count("rate_limited")
+                    retry_after = _retry_after_seconds(e) or 1.0
+                    self.scheduler.pause(retry_after)
+                elif isinstance(e, APITimeoutError):
+                    self._count("timeouts")
+                if attempt == self.max_retries:
+                    self._count("failed")
+                    raise LLMUnavailable(f"LLM request failed after {attempt + 1} attempts: {e}") from e
+                self._count("retries")
+                delay = retry_after or random.uniform(0, min(30, 2 ** attempt))
+                print(f"LLM call failed (attempt {attempt + 1}): {e}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _complete(self, estimated_tokens, priority, **params):
+        client = self._get_client()
+        completion = await self._attempts(estimated_tokens, priority,
+                                          lambda: client.chat.completions.create(**params))
+        if completion.usage is not None:
+            self.scheduler.settle(estimated_tokens, completion.usage.total_tokens)
+        return completion
+
+    async def _stream(self, estimated_tokens, priority, **params):
+        # Retries cover opening the stream; once tokens flow, errors reach the caller
+        client = self._get_client()
+        response = await self._attempts(estimated_tokens, priority,
+                                        lambda: client.chat.completions.create(stream=True, **params))
+        try:
+            async for chunk in response:
+                x_groq = getattr(chunk, "x_groq", None)
+                usage = getattr(x_groq, "usage", None) if x_groq is not None else None
+                if usage is not None:
+                    self.scheduler.settle(estimated_tokens, usage.total_tokens)
+                yield chunk
+        finally:
+            await response.close()
+
+    def complete(self, estimated_tokens, priority=INTERACTIVE, **params):
+        """Blocking chat completion from a worker thread; returns the Groq ChatCompletion."""
+        future = asyncio.run_coroutine_threadsafe(self._complete(estimated_tokens, priority, **params), self._ensure_loop())
+        try:
+            return future.result()
+        finally:
+            future.cancel()
+
+    def stream(self, estimated_tokens, priority=INTERACTIVE, **params):
+        """Blocking iterator over streamed chunks; closing it early cancels the request."""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for chunk in self._stream(estimated_tokens, priority, **params):
+                    chunks.put((chunk, None))
+            except BaseException as e:
+                chunks.put((done, e))
+                raise
+            chunks.put((done, None))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                chunk, error = chunks.get()
+                if chunk is done:
+                    if error is not None and not isinstance(error, asyncio.CancelledError):
+                        raise error
+                    return
+                yield chunk
+        finally:
+            future.cancel()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_seconds"] = round(stats["queue_seconds"], 3)
+        stats["waiting"] = self.scheduler.waiting()
+        return stats
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), loop).result(timeout=5)
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+
+
+gateway = LLMGateway()
@@ -1,14 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import os
+import json
+import asyncio
 import traceback
 import bot
 import features
+import executors
+import jobs
+import browserPool
+import searchCache
+import promptBuilder
+import responseCache
+import draftCoalescer
+import llmGateway
 # import reviewExtractor
 
 app = FastAPI()
 
+# Indexes older than this are refreshed in the background (0 disables scheduled refreshes)
+REFRESH_MAX_AGE = float(os.getenv("REFRESH_MAX_AGE_HOURS", "24")) * 3600
+REFRESH_CHECK_INTERVAL = float(os.getenv("REFRESH_CHECK_INTERVAL", "600"))
+# How often a scheduled refresh checks for a free scrape worker, or whether it has finished
+REFRESH_POLL_INTERVAL = 5
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +36,21 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Errors with their own status code; handlers re-raise these past their catch-all 500
+HANDLED_ERRORS = (HTTPException, executors.PoolSaturated, promptBuilder.PromptTooLarge, llmGateway.LLMUnavailable)
+
+@app.exception_handler(executors.PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: executors.PoolSaturated):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(promptBuilder.PromptTooLarge)
+async def prompt_too_large_handler(request: Request, exc: promptBuilder.PromptTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+@app.exception_handler(llmGateway.LLMUnavailable)
+async def llm_unavailable_handler(request: Request, exc: llmGateway.LLMUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 class ProductQuery(BaseModel):
     product_input: str
 
@@ -33,12 +66,116 @@ class UserPreferences(BaseModel):
 class ReviewText(BaseModel):
     text: str
 
+class DraftText(BaseModel):
+    session_id: str
+    text: str
+
 class GenerateTemplateRequest(BaseModel):
     product_name: str
     writing_style: str
     preferred_length: str
     focus_areas: List[str]
 
+@app.on_event("startup")
+def warm_browser_pool():
+    # Resolve chromedriver and start a browser in the background, off the request path
+    executors.scrape_pool.submit(browserPool.browser_pool.warm, int(os.getenv("BROWSER_POOL_WARM", "1")))
+
+def scrape_pool_idle():
+    stats = executors.scrape_pool.stats()
+    return stats["queued"] == 0 and stats["active"] < stats["max_workers"]
+
+async def refresh_scheduler():
+    """Periodically refresh products whose reviews have gone stale, one at a time.
+
+    Refreshes share the scrape pool with user ingestions, so each one waits
+    until the pool has a free worker and nothing queued.
+    """
+    while True:
+        await asyncio.sleep(REFRESH_CHECK_INTERVAL)
+        try:
+            stale = await executors.cpu_pool.run(bot.stale_products, REFRESH_MAX_AGE)
+            for product_input in stale:
+                while not scrape_pool_idle():
+                    await asyncio.sleep(REFRESH_POLL_INTERVAL)
+                job = start_refresh(product_input, min_age=REFRESH_MAX_AGE)
+                while job.finished_at is None:
+                    await asyncio.sleep(REFRESH_POLL_INTERVAL)
+        except executors.PoolSaturated:
+            # Busy serving requests; try again next round
+            continue
+        except Exception as e:
+            print(f"Error in refresh scheduler: {e}")
+
+@app.on_event("startup")
+def start_refresh_scheduler():
+    if REFRESH_MAX_AGE > 0:
+        asyncio.get_event_loop().create_task(refresh_scheduler())
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    executors.shutdown()
+    browserPool.browser_pool.close()
+    llmGateway.gateway.close()
+
+def start_ingestion(product_input):
+    """Queue an ingestion job for the product, or return the one already running."""
+    return jobs.submit(
+        bot.product_key(product_input),
+        product_input,
+        lambda progress: bot.get_or_create_db_for_input(product_input, progress),
+    )
+
+def start_refresh(product_input, min_age=None):
+    """Queue an incremental refresh job for an indexed product."""
+    return jobs.submit(
+        f"refresh:{bot.product_key(product_input)}",
+        product_input,
+        lambda progress: bot.refresh_db(product_input, progress, min_age),
+        kind="refresh",
+    )
+
+def ingestion_pending(product_input):
+    """202 response pointing the client at the ingestion job for an unindexed product."""
+    job = start_ingestion(product_input).to_dict()
+    return JSONResponse(status_code=202, content={"job_id": job["job_id"], "status": job["status"], "stage": job["stage"]})
+
+def sse_response(tokens):
+    """Server-sent events for an async iterator of text: one data event per token, then done."""
+    async def events():
+        try:
+            async for token in tokens:
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print(f"Error while streaming: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def load_product_db(product_input):
+    """Load an indexed product on the CPU pool; returns None while it still needs ingesting."""
+    if jobs.active_job(bot.product_key(product_input)) is not None:
+        return None
+    try:
+        return await executors.cpu_pool.run(bot.load_db, product_input)
+    except FileNotFoundError:
+        return None
+
+async def load_insights(db, product_input):
+    """Read the product's stored insights, generating them on the LLM pool the first time."""
+    insights = await executors.cpu_pool.run(bot.stored_insights, product_input)
+    if insights is None:
+        insights = await executors.llm_pool.run(bot.product_insights, db, product_input)
+    return insights
+
+@app.options("/ingest")
+@app.options("/answer_query/stream")
+@app.options("/text_completion/stream")
+@app.options("/real_time_feedback/stream")
+@app.options("/draft_assist")
+@app.options("/refresh")
+@app.options("/rating_analytics")
 @app.options("/product_summary")
 @app.options("/component_ratings")
 @app.options("/answer_query")
@@ -49,29 +186,72 @@ class GenerateTemplateRequest(BaseModel):
 async def options_handler():
     return {"message": "OK"}
 
+@app.post("/ingest")
+async def ingest_product(product_query: ProductQuery):
+    """Start scraping and indexing a product and return the job to poll."""
+    if bot.index_exists(product_query.product_input):
+        price, image_url = await executors.cpu_pool.run(bot.load_product_details, product_query.product_input)
+        return {"job_id": None, "status": "done", "stage": "done", "price": price, "image_url": image_url}
+    return JSONResponse(status_code=202, content=start_ingestion(product_query.product_input).to_dict())
+
+@app.get("/ingest/{job_id}")
+async def get_ingest_status(job_id: str):
+    """Report the stage and progress counters of an ingestion job."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingestion job.")
+    return job
+
+@app.post("/refresh")
+async def refresh_product(product_query: ProductQuery):
+    """Fetch reviews posted since the product was indexed and return the job to poll."""
+    if not bot.index_exists(product_query.product_input):
+        raise HTTPException(status_code=404, detail="Product is not indexed yet; use /ingest.")
+    return JSONResponse(status_code=202, content=start_refresh(product_query.product_input).to_dict())
+
+@app.post("/rating_analytics")
+async def get_rating_analytics(product_query: ProductQuery):
+    """Star rating histogram, means and trend from the scraped review metadata, without an LLM call."""
+    if jobs.active_job(bot.product_key(product_query.product_input)) is not None:
+        return ingestion_pending(product_query.product_input)
+    if not bot.index_exists(product_query.product_input):
+        raise HTTPException(status_code=404, detail="Product is not indexed yet; use /ingest.")
+    try:
+        return await executors.cpu_pool.run(bot.rating_analytics, product_query.product_input)
+    except HANDLED_ERRORS:
+        raise
+    except Exception as e:
+        print(f"Error in get_rating_analytics: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/product_summary")
 async def get_product_summary(product_query: ProductQuery):
     """Fetch product summary, price, and image."""
     try:
+        loaded = await load_product_db(product_query.product_input)
+        if loaded is None:
+            return ingestion_pending(product_query.product_input)
+        db, price, image_url = loaded
         if product_query.product_input.startswith("http"):
-            db, price, image_url = bot.get_or_create_db_from_link(product_query.product_input)
             display_name = bot.extract_product_name_from_url(product_query.product_input)
         else:
-            db, price, image_url = bot.get_or_create_db(product_query.product_input)
             display_name = product_query.product_input
         
         if db is None:
             raise HTTPException(status_code=404, detail="No reviews found for this product.")
         
-        summary = bot.get_product_summary(db, product_query.product_input)
+        insights = await load_insights(db, product_query.product_input)
 
         return {
-            "summary": summary,
+            "summary": insights["summary"],
             "price": price,
             "image_url": image_url,
             "display_name": display_name
         }
 
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in get_product_summary: {str(e)}")
         print(traceback.format_exc())
@@ -80,21 +260,24 @@ async def get_product_summary(product_query: ProductQuery):
 @app.post("/component_ratings")
 async def get_component_ratings(product_query: ProductQuery):
     try:
-        if product_query.product_input.startswith("http"):
-            db, price, image_url = bot.get_or_create_db_from_link(product_query.product_input)
-        else:
-            db, price, image_url = bot.get_or_create_db(product_query.product_input)
+        loaded = await load_product_db(product_query.product_input)
+        if loaded is None:
+            return ingestion_pending(product_query.product_input)
+        db, price, image_url = loaded
         
         if db is None:
             raise HTTPException(status_code=404, detail="No reviews found for this product.")
         
-        ratings = bot.extract_component_ratings(db, product_query.product_input)
+        insights = await load_insights(db, product_query.product_input)
+        ratings = await executors.cpu_pool.run(bot.extract_component_ratings, db, product_query.product_input, insights)
         print(f"Component ratings: {ratings}")  # Add logging
         return {
             "ratings": ratings,
             "price": price,
             "image_url": image_url
         }
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in get_component_ratings: {str(e)}")
         print(traceback.format_exc())
@@ -104,24 +287,49 @@ async def get_component_ratings(product_query: ProductQuery):
 async def answer_query(review_query: ReviewQuery):
     try:
         # Unpack all three returned values
-        db, price, image_url = bot.get_or_create_db(review_query.product_name)
+        loaded = await load_product_db(review_query.product_name)
+        if loaded is None:
+            return ingestion_pending(review_query.product_name)
+        db, price, image_url = loaded
         if db is None:
             raise HTTPException(status_code=404, detail="No reviews found for this product.")
             
-        answer, _ = bot.get_response_from_query(db, review_query.query)
+        docs = await executors.cpu_pool.run(bot.search_reviews, db, review_query.query)
+        answer, _ = await executors.llm_pool.run(bot.get_response_from_query, db, review_query.query, docs)
         return {"answer": answer}
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in answer_query: {str(e)}")  # Add logging
         print(traceback.format_exc())  # Print full traceback
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/answer_query/stream")
+async def stream_answer_query(review_query: ReviewQuery):
+    """Stream the answer to a question about a product as server-sent events."""
+    try:
+        loaded = await load_product_db(review_query.product_name)
+        if loaded is None:
+            return ingestion_pending(review_query.product_name)
+        db, price, image_url = loaded
+        docs = await executors.cpu_pool.run(bot.search_reviews, db, review_query.query)
+        return sse_response(executors.llm_pool.stream(bot.stream_response_from_query, db, review_query.query, docs))
+    except HANDLED_ERRORS:
+        raise
+    except Exception as e:
+        print(f"Error in stream_answer_query: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/personalize_review_style")
 async def personalize_style(preferences: UserPreferences):
     try:
         print(f"Received preferences: {preferences}")  # Log incoming data
-        style_suggestion = features.personalize_review_style(preferences.dict())
+        style_suggestion = await executors.llm_pool.run(features.personalize_review_style, preferences.dict())
         print(f"Generated style suggestion: {style_suggestion}")  # Log generated suggestion
         return {"style_suggestion": style_suggestion}
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in personalize_style: {str(e)}")
         print(traceback.format_exc())  # Print full traceback
@@ -130,19 +338,56 @@ async def personalize_style(preferences: UserPreferences):
 @app.post("/text_completion")
 async def complete_text(review_text: ReviewText):
     try:
-        completion = features.text_completion(review_text.text)
+        completion = await executors.llm_pool.run(features.text_completion, review_text.text)
         return {"completion": completion}
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/real_time_feedback")
 async def get_feedback(review_text: ReviewText):
     try:
-        feedback = features.real_time_feedback(review_text.text)
+        feedback = await executors.llm_pool.run(features.real_time_feedback, review_text.text)
         return {"feedback": feedback}
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/text_completion/stream")
+async def stream_complete_text(review_text: ReviewText):
+    try:
+        return sse_response(executors.llm_pool.stream(features.stream_text_completion, review_text.text))
+    except HANDLED_ERRORS:
+        raise
+    except Exception as e:
+        print(f"Error in stream_complete_text: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/real_time_feedback/stream")
+async def stream_feedback(review_text: ReviewText):
+    try:
+        return sse_response(executors.llm_pool.stream(features.stream_real_time_feedback, review_text.text))
+    except HANDLED_ERRORS:
+        raise
+    except Exception as e:
+        print(f"Error in stream_feedback: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/draft_assist")
+async def draft_assist(draft: DraftText):
+    """Completion and feedback for a draft being typed; stale drafts come back as superseded."""
+    try:
+        return await draftCoalescer.draft_coalescer.submit(draft.session_id, draft.text)
+    except HANDLED_ERRORS:
+        raise
+    except Exception as e:
+        print(f"Error in draft_assist: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/generate_review_template")
 async def get_review_template(request: GenerateTemplateRequest):
     try:
@@ -151,12 +396,30 @@ async def get_review_template(request: GenerateTemplateRequest):
             "preferred_length": request.preferred_length,
             "focus_areas": request.focus_areas
         }
-        template = features.generate_review_template(request.product_name, preferences)
+        template = await executors.llm_pool.run(features.generate_review_template, request.product_name, preferences)
         return {"template": template}
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         print(f"Error in get_review_template: {str(e)}")  # Add this line for debugging
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def get_metrics():
+    """Report queue depth and throughput for the worker pools."""
+    return {
+        "pools": executors.get_stats(),
+        "ingestions": bot.ingestions.stats(),
+        "index_cache": bot.index_cache.stats(),
+        "embeddings": bot.embeddings.stats(),
+        "llm_usage": promptBuilder.usage.stats(),
+        "llm_cache": responseCache.response_cache.stats(),
+        "llm_gateway": llmGateway.gateway.stats(),
+        "drafts": draftCoalescer.draft_coalescer.stats(),
+        "browsers": browserPool.browser_pool.stats(),
+        "search_cache": searchCache.search_cache.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,166 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Headers to avoid request blocking
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Per-host token bucket whose refill rate backs off on throttling and recovers on success."""
+
+    def __init__(self, rate, burst, min_rate=None, max_rate=None):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.max_rate = max_rate if max_rate is not None else rate
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request to this host is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        """Halve the rate after a 429/5xx, and pause entirely for Retry-After if given."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def reward(self):
+        """Additively raise the rate again after a successful response."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PageFetcher:
+    """Connection-pooled HTTP fetcher with bounded prefetching and per-host rate limits."""
+
+    def __init__(self, concurrency=4, rate=1.0, burst=2, max_retries=3, timeout=15, headers=None, session=None):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        session.headers.update(headers or DEFAULT_HEADERS)
+        self.session = session
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch")
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def fetch(self, url):
+        """GET a URL under the host's rate limit, retrying throttled and failed requests.
+
+        Returns the last response (which may still be an error status), or None
+        if every attempt failed at the connection level.
+        """
+        bucket = self.bucket(url)
+        response = None
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Request to {url} failed (attempt {attempt + 1}): {e}")
+                bucket.penalize()
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    bucket.reward()
+                    return response
+                print(f"Got {response.status_code} from {url} (attempt {attempt + 1}), backing off")
+                bucket.penalize(_retry_after_seconds(response))
+            if attempt < self.max_retries:
+                time.sleep(random.uniform(0, 2 ** attempt))
+        return response
+
+    def iter_pages(self, urls, depth=None):
+        """Yield (url, response) in order, keeping up to `depth` (default `concurrency`) pages in flight.
+
+        The page being handed out counts towards depth, so depth=1 fetches
+        nothing the caller has not asked for. Closing the generator early
+        cancels the pages that have not started yet.
+        """
+        urls = iter(urls)
+        pending = deque()
+
+        def schedule():
+            for url in urls:
+                pending.append((url, self._executor.submit(self.fetch, url)))
+                return True
+            return False
+
+        for _ in range(depth or self.concurrency):
+            if not schedule():
+                break
+        try:
+            while pending:
+                url, future = pending.popleft()
+                response = future.result()
+                yield url, response
+                schedule()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+fetcher = PageFetcher(
+    concurrency=int(os.getenv("FETCH_CONCURRENCY", "4")),
+    rate=float(os.getenv("FETCH_RATE_PER_HOST", "1.0")),
+    burst=int(os.getenv("FETCH_BURST", "2")),
+    max_retries=int(os.getenv("FETCH_MAX_RETRIES", "3")),
+)
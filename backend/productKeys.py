@@ -0,0 +1,105 @@
+import os
+import re
+import hashlib
+import sqlite3
+from urllib.parse import urlsplit, parse_qs
+from searchCache import normalize_query
+
+ALIAS_DB_PATH = os.getenv("PRODUCT_ALIAS_DB_PATH", os.path.join("product_dbs", "aliases.db"))
+
+
+def is_url(product_input):
+    return product_input.strip().lower().startswith("http")
+
+
+def url_keys(url):
+    """Every key that identifies the product behind a Flipkart URL, most stable first.
+
+    The `/p/itm...` item id is in the path of every product URL; the `pid`
+    query parameter is often present too but is easily stripped when shared.
+    """
+    parts = urlsplit(url.strip())
+    keys = []
+    match = re.search(r'/p/(itm[0-9a-z]+)', parts.path, re.IGNORECASE)
+    if match:
+        keys.append(f"itm:{match.group(1).lower()}")
+    pid = parse_qs(parts.query).get("pid")
+    if pid and pid[0].strip():
+        keys.append(f"pid:{pid[0].strip().upper()}")
+    if not keys:
+        keys.append(f"url:{parts.netloc.lower()}{parts.path.rstrip('/')}")
+    return keys
+
+
+def canonical_key(product_input):
+    """Map a product name or Flipkart URL to a stable key.
+
+    URLs resolve to the Flipkart product id, so tracking parameters and slugs
+    don't matter. Names are folded for case, punctuation and whitespace.
+    """
+    product_input = product_input.strip()
+    if is_url(product_input):
+        return url_keys(product_input)[0]
+    return f"name:{normalize_query(product_input)}"
+
+
+def key_filename(key):
+    """Readable, collision-free filename for a canonical key."""
+    slug = re.sub(r'[^a-z0-9]+', '-', key.lower()).strip('-')[:60]
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f"{slug}-{digest}"
+
+
+class AliasTable:
+    """Persistent map from alternative canonical keys to the key that owns the index."""
+
+    def __init__(self, path=ALIAS_DB_PATH):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            conn.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, target TEXT)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def lookup(self, key):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT target FROM aliases WHERE alias = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def add(self, alias, target):
+        """Point alias at target unless it already points somewhere; returns True if added."""
+        if alias == target:
+            return False
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute("INSERT OR IGNORE INTO aliases VALUES (?, ?)", (alias, target)).rowcount > 0
+        finally:
+            conn.close()
+
+
+aliases = AliasTable()
+
+
+def resolve(product_input):
+    """Canonical key for the input, following the alias table."""
+    if is_url(product_input):
+        # A pid-only URL can still map to an index stored under the item id
+        for key in url_keys(product_input):
+            target = aliases.lookup(key)
+            if target:
+                return target
+        return canonical_key(product_input)
+    key = canonical_key(product_input)
+    return aliases.lookup(key) or key
@@ -0,0 +1,167 @@
+import os
+import time
+import threading
+from transformers import AutoTokenizer
+import responseCache
+import llmGateway
+
+MODEL = os.getenv("GROQ_MODEL", "llama3-70b-8192")
+CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "8192"))
+# Counts come from the MiniLM tokenizer, not Llama's, so keep some headroom
+SAFETY_MARGIN = float(os.getenv("PROMPT_SAFETY_MARGIN", "0.1"))
+
+tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2', clean_up_tokenization_spaces=True)
+
+
+class PromptTooLarge(ValueError):
+    """The fixed part of a prompt leaves no room for the completion."""
+
+
+def count_tokens(text):
+    return len(tokenizer(text, add_special_tokens=False)['input_ids'])
+
+
+def prompt_budget(max_tokens):
+    """Tokens a prompt may use when max_tokens are reserved for the completion."""
+    return int((CONTEXT_WINDOW - max_tokens) * (1 - SAFETY_MARGIN))
+
+
+def build_prompt(template, max_tokens, docs=(), **fields):
+    """Fill template's {context} with as many docs as fit, in the given (relevance) order.
+
+    Returns (prompt, used_docs). Raises PromptTooLarge when the template and
+    fields alone exceed the budget.
+    """
+    budget = prompt_budget(max_tokens)
+    used = count_tokens(template.format(context="", **fields))
+    if used > budget:
+        raise PromptTooLarge(f"Prompt needs {used} tokens but only {budget} fit alongside the completion.")
+
+    used_docs = []
+    for doc in docs:
+        size = count_tokens(doc.page_content) + 1
+        if used + size > budget:
+            break
+        used_docs.append(doc)
+        used += size
+    context = "\n".join(doc.page_content for doc in used_docs)
+    return template.format(context=context, **fields), used_docs
+
+
+class UsageTracker:
+    """Per-endpoint LLM call counts, token usage and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, prompt_tokens, completion_tokens, seconds, ttft=None):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0,
+                "streamed": 0, "ttft_seconds": 0.0})
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["seconds"] += seconds
+            if ttft is not None:
+                stats["streamed"] += 1
+                stats["ttft_seconds"] += ttft
+
+    def stats(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    **stats,
+                    "seconds": round(stats["seconds"], 3),
+                    "ttft_seconds": round(stats["ttft_seconds"], 3),
+                    "avg_ttft": round(stats["ttft_seconds"] / stats["streamed"], 3) if stats["streamed"] else None,
+                    "avg_prompt_tokens": round(stats["prompt_tokens"] / stats["calls"], 1),
+                    "avg_completion_tokens": round(stats["completion_tokens"] / stats["calls"], 1),
+                    "avg_latency": round(stats["seconds"] / stats["calls"], 3),
+                }
+                for endpoint, stats in self._endpoints.items()
+            }
+
+
+usage = UsageTracker()
+
+
+def complete(endpoint, prompt, max_tokens, temperature=1.2, top_p=1, cache_for=None,
+             priority=llmGateway.INTERACTIVE, json_mode=False):
+    """Run one chat completion through the LLM gateway and record its token usage under endpoint.
+
+    cache_for=(product_key, index_version) serves repeats of the same prompt
+    from responseCache until that product's index changes. json_mode makes
+    the model reply with a single JSON object.
+    """
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+    cache_key = None
+    if cache_for is not None:
+        product_key, index_version = cache_for
+        params = {"max_tokens": max_tokens, "temperature": temperature, "top_p": top_p, **extra}
+        cache_key = responseCache.make_key(MODEL, prompt, params, index_version)
+        cached = responseCache.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    start = time.perf_counter()
+    prompt_tokens = count_tokens(prompt)
+    completion = llmGateway.gateway.complete(
+        prompt_tokens + max_tokens,
+        priority,
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        **extra,
+    )
+    elapsed = time.perf_counter() - start
+    if completion.usage is not None:
+        usage.record(endpoint, completion.usage.prompt_tokens, completion.usage.completion_tokens, elapsed)
+    else:
+        usage.record(endpoint, prompt_tokens, 0, elapsed)
+    response = completion.choices[0].message.content.strip()
+    if cache_key is not None:
+        responseCache.response_cache.put(cache_key, product_key, response)
+    return response
+
+
+def stream(endpoint, prompt, max_tokens, temperature=1.2, top_p=1, priority=llmGateway.INTERACTIVE):
+    """Yield the completion's text as Groq streams it, recording usage and time to first token."""
+    start = time.perf_counter()
+    ttft = None
+    parts = []
+    reported = None
+    prompt_tokens = count_tokens(prompt)
+    response = llmGateway.gateway.stream(
+        prompt_tokens + max_tokens,
+        priority,
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+    )
+    try:
+        for chunk in response:
+            # Groq reports token usage on the last chunk
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                reported = x_groq.usage
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(text)
+                yield text
+    finally:
+        response.close()
+        elapsed = time.perf_counter() - start
+        if reported is not None:
+            usage.record(endpoint, reported.prompt_tokens, reported.completion_tokens, elapsed, ttft)
+        else:
+            usage.record(endpoint, prompt_tokens, count_tokens("".join(parts)), elapsed, ttft)
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("product_dbs", "llm_cache.db"))
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+
+def make_key(model, prompt, params, index_version):
+    """Hash of everything that determines a completion for a product's index."""
+    payload = json.dumps([model, hashlib.sha256(prompt.encode("utf-8")).hexdigest(), params, index_version],
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk cache of LLM responses with a TTL and least-recently-used eviction by size."""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "cache_key TEXT PRIMARY KEY, product_key TEXT, response TEXT, size INTEGER, "
+                "created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_product ON responses (product_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, cache_key):
+        """Return the cached response, or None if missing or expired."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE cache_key = ? AND created_at >= ?",
+                    (cache_key, now - self.ttl),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_used = ? WHERE cache_key = ?", (now, cache_key))
+        finally:
+            conn.close()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, cache_key, product_key, response):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, product_key, response, len(response.encode("utf-8")), now, now),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                evicted = self._evict(conn)
+        finally:
+            conn.close()
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return evicted
+        for cache_key, size in conn.execute("SELECT cache_key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def invalidate(self, product_key):
+        """Drop every response generated from a product's index."""
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute("DELETE FROM responses WHERE product_key = ?", (product_key,)).rowcount
+        finally:
+            conn.close()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+response_cache = ResponseCache()
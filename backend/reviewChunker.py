@@ -0,0 +1,59 @@
+import os
+import re
+from langchain_core.documents import Document
+
+# all-MiniLM-L6-v2 was trained on 128-token inputs and truncates at 256
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "128"))
+
+# Preprocessing keeps . ! ? so reviews can still be split into sentences
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def token_counts(tokenizer, texts):
+    if not texts:
+        return []
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
+
+
+def _pack(pieces, counts, max_tokens):
+    """Greedily join consecutive pieces into chunks of at most max_tokens."""
+    chunks, current, size = [], [], 0
+    for piece, count in zip(pieces, counts):
+        if current and size + count > max_tokens:
+            chunks.append(' '.join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += count
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def split_long_review(tokenizer, text, max_tokens=CHUNK_TOKENS):
+    """Split a review over the token limit at sentence, then word, boundaries."""
+    sentences = [s for s in SENTENCE_END_RE.split(text) if s]
+    pieces, counts = [], []
+    for sentence, count in zip(sentences, token_counts(tokenizer, sentences)):
+        if count <= max_tokens:
+            pieces.append(sentence)
+            counts.append(count)
+        else:
+            # A run-on sentence: fall back to words
+            words = sentence.split()
+            pieces.extend(words)
+            counts.extend(token_counts(tokenizer, words))
+    return _pack(pieces, counts, max_tokens)
+
+
+def chunk_reviews(texts, tokenizer, metadatas=None, max_tokens=CHUNK_TOKENS):
+    """One Document per review, splitting only reviews longer than max_tokens.
+
+    Every chunk carries its review's metadata plus its position in the review.
+    """
+    docs = []
+    for i, (text, count) in enumerate(zip(texts, token_counts(tokenizer, texts))):
+        metadata = metadatas[i] if metadatas else {}
+        chunks = [text] if count <= max_tokens else split_long_review(tokenizer, text, max_tokens)
+        for n, chunk in enumerate(chunks):
+            docs.append(Document(page_content=chunk, metadata={**metadata, 'chunk': n}))
+    return docs
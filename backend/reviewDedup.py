@@ -0,0 +1,87 @@
+import os
+import zlib
+import numpy as np
+
+# Reviews whose estimated Jaccard similarity reaches this are treated as copies (1 = exact only)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+
+# 16 bands of 4 rows: pairs at 0.8 similarity collide in some band with probability > 0.999
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def shingles(text):
+    """Word 3-grams, or the whole text for reviews shorter than that."""
+    words = text.split()
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """MinHash signature of a normalized review."""
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles(text)), dtype=np.uint64)
+    # (a*x + b) mod p stays below 2**64 since a, b < 2**31 and x < 2**32
+    return ((np.outer(_A, hashes) + _B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+def dedupe(reviews, threshold=NEAR_DUP_THRESHOLD, key=None):
+    """Drop exact and near-duplicate reviews, keeping the first of each group in order.
+
+    key extracts the text when reviews are records rather than strings.
+
+    Returns (kept_reviews, stats). Near duplicates are found with MinHash
+    signatures bucketed by LSH bands, then confirmed on the estimated Jaccard
+    similarity of the full signatures.
+    """
+    reviews = list(reviews)
+    kept = []
+    seen = set()
+    signatures = np.empty((max(len(reviews), 1), NUM_PERM), dtype=np.uint64)
+    n_signatures = 0
+    buckets = {}
+    exact = near = 0
+    for review in reviews:
+        text = normalize(key(review) if key else review)
+        if text in seen:
+            exact += 1
+            continue
+        seen.add(text)
+
+        if threshold < 1:
+            signature = minhash(text)
+            bands = [(b, signature[b * ROWS:(b + 1) * ROWS].tobytes()) for b in range(BANDS)]
+            candidates = {i for band in bands for i in buckets.get(band, ())}
+            if candidates:
+                similarity = (signatures[list(candidates)] == signature).mean(axis=1)
+                if similarity.max() >= threshold:
+                    near += 1
+                    continue
+            for band in bands:
+                buckets.setdefault(band, []).append(n_signatures)
+            signatures[n_signatures] = signature
+            n_signatures += 1
+        kept.append(review)
+
+    total = len(kept) + exact + near
+    stats = {
+        'input': total,
+        'kept': len(kept),
+        'exact_duplicates': exact,
+        'near_duplicates': near,
+        'dedup_ratio': round((exact + near) / total, 4) if total else 0.0,
+    }
+    print(f"Dedup: kept {len(kept)} of {total} reviews "
+          f"({exact} exact, {near} near duplicates, ratio {stats['dedup_ratio']:.1%})")
+    return kept, stats
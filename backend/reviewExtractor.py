@@ -1,121 +1,134 @@
 from datetime import datetime
-import time
 import re
-import random
 import os
-import requests
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-from bs4 import BeautifulSoup
 from textblob import TextBlob
 import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 from nltk.tokenize import sent_tokenize
 from linkExtractor import get_product_links
+from pageFetcher import fetcher
+from reviewParser import parser
+from textPreprocessor import clean_text, remove_stopwords, lemmatize_text, preprocess_reviews, preprocess_batch
+from reviewDedup import dedupe
 
 # Download necessary NLTK datasets
 nltk.download('stopwords')
 nltk.download('wordnet')
 nltk.download('punkt')
 
-# Headers to avoid request blocking
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
+# Caps how many product links are scraped at once across all ingestions
+LINK_CONCURRENCY = int(os.getenv("LINK_CONCURRENCY", "5"))
+link_executor = ThreadPoolExecutor(max_workers=LINK_CONCURRENCY, thread_name_prefix="links")
+
+# Stop scraping further pages once this many reviews are collected (0 = no limit)
+TARGET_REVIEWS = int(os.getenv("INGEST_TARGET_REVIEWS", "0")) or None
 
 # -------------------- REVIEW EXTRACTION --------------------
 def modify_reviews_url(reviews_url):
     """Convert product URL to reviews URL format"""
     return reviews_url.replace("/p/", "/product-reviews/")
 
-def get_reviews_from_page(html):
-    """Extract reviews from a single Flipkart page."""
-    reviews_data = []
-    review_containers = html.find_all('div', {'class': 'cPHDOP'})  # Flipkart review container
-    
-    for container in review_containers:
-        try:
-            # Extract rating
-            rating_div = container.find('div', {'class': 'XQDdHH Ga3i8K'})
-            rating = rating_div.text.strip() if rating_div else 'N/A'
-            
-            # Extract review title
-            title_div = container.find('p', {'class': 'z9E0IG'})
-            title = title_div.text.strip() if title_div else 'N/A'
-            
-            # Extract review text
-            review_div = container.find('div', {'class': 'ZmyHeo'})
-            review_text = review_div.find('div').text.strip() if review_div and review_div.find('div') else 'N/A'
-            
-            # Extract reviewer name
-            name_div = container.find('p', {'class': '_2NsDsF AwS1CA'})
-            name = name_div.text.strip() if name_div else 'N/A'
-            
-            # Extract review date
-            date_div = container.find('p', {'class': '_2NsDsF'})
-            date = date_div.text.strip() if date_div and not date_div.get('class') == '_2NsDsF AwS1CA' else 'N/A'
-            
-            # Extract certified buyer status
-            certified_div = container.find('p', {'class': 'MztJPv'})
-            is_certified = 'Yes' if certified_div and 'Certified Buyer' in certified_div.text else 'No'
-            
-            # Get helpful votes
-            helpful_div = container.find('span', {'class': 'tl9VpF'})
-            helpful_count = helpful_div.text.strip() if helpful_div else '0'
-            
-            reviews_data.append({
-                'Name': name,
-                'Rating': rating,
-                'Title': title,
-                'Description': review_text,
-                'Date': date,
-                'Certified_Buyer': is_certified,
-                'Helpful_Votes': helpful_count
-            })
-            
-        except Exception as e:
-            print(f"Error processing review: {e}")
-            continue
-    
-    return reviews_data
+def get_reviews_from_page(content):
+    """Extract reviews from the raw HTML of a single Flipkart page."""
+    return parser.parse_reviews(content)
+
+def newest_first_url(reviews_url):
+    """Ask Flipkart for the most recent reviews first."""
+    parts = urlsplit(reviews_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != 'sortOrder'] + [('sortOrder', 'MOST_RECENT')]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+# Bumped whenever review_fingerprint changes, so stores with older fingerprints are rebuilt once
+FINGERPRINT_VERSION = 2
+
+def review_fingerprint(review):
+    """Stable identity of a scraped review, independent of page position and variant link.
+
+    The date is left out: Flipkart shows recent reviews as "3 months ago",
+    which changes as the review ages.
+    """
+    parts = [' '.join(str(review.get(field, '')).lower().split()) for field in ('Name', 'Rating', 'Title', 'Description')]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def review_metadata(review):
+    """Fields kept alongside each embedded chunk."""
+    return {
+        'rating': review.get('Rating', 'N/A'),
+        'date': review.get('Date', 'N/A'),
+        'certified_buyer': review.get('Certified_Buyer', 'No'),
+        'helpful_votes': review.get('Helpful_Votes', '0'),
+        'fingerprint': review_fingerprint(review),
+    }
+
+def prepare_reviews(raw_reviews, progress=None):
+    """Preprocess and deduplicate reviews; returns (texts, metadatas, dedup_stats) in matching order."""
+    if progress:
+        progress(stage="preprocessing")
+    processed = preprocess_batch([review['Description'] for review in raw_reviews])
+    records = [(text, review_metadata(review)) for text, review in zip(processed, raw_reviews) if text]
+
+    # Variant links share most of their reviews; embed each one once
+    if progress:
+        progress(stage="deduplicating")
+    records, dedup_stats = dedupe(records, key=lambda record: record[0])
+    return [text for text, _ in records], [metadata for _, metadata in records], dedup_stats
+
+def page_url(base_url, page):
+    """Build the URL of a review page."""
+    return f"{base_url}&page={page}" if page > 1 else base_url
 
-def get_reviews(base_url, max_pages=10):
-    """Extract reviews from multiple pages."""
+def get_reviews(base_url, max_pages=10, progress=None, stop_event=None, stop_when=None, prefetch=None):
+    """Extract reviews from multiple pages.
+
+    Stops early once stop_event is set, or after a page for which
+    stop_when(page_reviews) returns True. prefetch caps how many pages are
+    requested ahead of the one being parsed (default: the fetcher's concurrency).
+    """
     all_reviews = []
-    page = 1
-    
-    while page <= max_pages:
-        try:
-            # Construct page URL
-            page_url = f"{base_url}&page={page}" if page > 1 else base_url
-                
-            print(f"Fetching reviews from page {page}")
-            
-            response = requests.get(page_url, headers=headers)
-            if response.status_code != 200:
-                print(f"Failed to fetch page {page}. Status code: {response.status_code}")
+    page_urls = [page_url(base_url, page) for page in range(1, max_pages + 1)]
+
+    # Pages are prefetched a few at a time; the fetcher's per-host token bucket paces requests
+    pages = fetcher.iter_pages(page_urls, prefetch)
+    try:
+        for page, (url, response) in enumerate(pages, start=1):
+            if stop_event is not None and stop_event.is_set():
+                print(f"Stopping at page {page}: enough reviews collected")
                 break
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
-            print(f"Page HTML length: {len(response.content)}")  # Debug info
-            
-            # Get reviews from current page
-            page_reviews = get_reviews_from_page(soup)
-            
-            if not page_reviews:
-                print(f"No reviews found on page {page}")
+            try:
+                print(f"Fetching reviews from page {page}")
+
+                if response is None or response.status_code != 200:
+                    status = response.status_code if response is not None else "no response"
+                    print(f"Failed to fetch page {page}. Status code: {status}")
+                    break
+
+                print(f"Page HTML length: {len(response.content)}")  # Debug info
+
+                # Get reviews from current page
+                page_reviews = get_reviews_from_page(response.content)
+
+                if not page_reviews:
+                    print(f"No reviews found on page {page}")
+                    break
+
+                all_reviews.extend(page_reviews)
+                print(f"Successfully scraped {len(page_reviews)} reviews from page {page}")
+                if progress:
+                    progress(pages_fetched=1, reviews_parsed=len(page_reviews))
+
+                if stop_when is not None and stop_when(page_reviews):
+                    print(f"Stopping after page {page}")
+                    break
+
+            except Exception as e:
+                print(f"Error processing page {page}: {e}")
                 break
-                
-            all_reviews.extend(page_reviews)
-            print(f"Successfully scraped {len(page_reviews)} reviews from page {page}")
-            
-            # Random delay to avoid being blocked
-            time.sleep(random.uniform(2, 4))
-            page += 1
-            
-        except Exception as e:
-            print(f"Error processing page {page}: {e}")
-            break
+    finally:
+        pages.close()
     
     return all_reviews
 
@@ -129,72 +142,29 @@ def get_product_details(product_url):
     print(f"\nFetching product details from: {product_url}")
     
     try:
-        response = requests.get(product_url, headers=headers)
-        if response.status_code != 200:
-            print(f"Failed to fetch product page. Status code: {response.status_code}")
+        response = fetcher.fetch(product_url)
+        if response is None or response.status_code != 200:
+            print(f"Failed to fetch product page. Status code: {getattr(response, 'status_code', None)}")
             return "N/A", "N/A"
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract price with better error handling
-        try:
-            price_div = soup.find('div', {'class': 'Nx9bqj'})
-            price = price_div.text.strip() if price_div else "N/A"
-        except Exception as e:
-            print(f"Error extracting price: {e}")
-            price = "N/A"
-
-        # Extract product image with better error handling
-        try:
-            img_tag = soup.find('img', {'class': 'DByuf4 IZexXJ jLEJ7H'})
-            image_url = img_tag['src'] if img_tag else "N/A"
-        except Exception as e:
-            print(f"Error extracting image: {e}")
-            image_url = "N/A"
-        
+        price, image_url = parser.parse_product_details(response.content)
         return price, image_url
 
     except Exception as e:
         print(f"Error fetching product details: {e}")
         return "N/A", "N/A"
 
-# -------------------- PREPROCESSING --------------------
-
-def clean_text(text):
-    """Clean the review text."""
-    text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-    text = re.sub(r'READ MORE', '', text, flags=re.IGNORECASE)  # Remove "READ MORE"
-    text = re.sub(r'[^a-zA-Z0-9\s.,!?]', '', text)  # Remove special characters but keep punctuation
-    text = ' '.join(text.split())  # Normalize whitespace
-    return text.strip()
-
-def remove_stopwords(text):
-    """Remove stopwords from text."""
-    stop_words = set(stopwords.words('english'))
-    return ' '.join(word for word in text.split() if word.lower() not in stop_words)
-
-def lemmatize_text(text):
-    """Lemmatize words in text."""
-    lemmatizer = WordNetLemmatizer()
-    return ' '.join(lemmatizer.lemmatize(word) for word in text.split())
-
-def preprocess_reviews(reviews):
-    """Apply preprocessing pipeline to reviews."""
-    processed_reviews = []
-    for review in reviews:
-        # Clean text
-        cleaned = clean_text(review)
-        # Remove stopwords & lemmatize
-        processed_review = lemmatize_text(remove_stopwords(cleaned))
-        if len(processed_review.split()) >= 3:  # Keep only meaningful reviews
-            processed_reviews.append(processed_review)
-    
-    return processed_reviews
-
 # -------------------- MAIN FUNCTION --------------------
 
-def extractReviews(name, max_pages=15):
-    """Extract Flipkart reviews and product price."""
+def extractReviews(name, max_pages=15, progress=None, target_reviews=TARGET_REVIEWS):
+    """Extract Flipkart reviews and product price.
+
+    Product links are scraped in parallel and their reviews aggregated as each
+    link finishes. With target_reviews set, all links stop fetching new pages
+    once that many reviews have been collected.
+    """
+    if progress:
+        progress(stage="discovering_links")
     links = get_product_links(name)
     
     if not links:
@@ -202,16 +172,38 @@ def extractReviews(name, max_pages=15):
         return [], "N/A", "N/A"
 
     all_reviews = []
-    
-    # Iterate through each product link
-    for link in links:  # Only process first link to avoid duplicates
+    if progress:
+        progress(stage="fetching_reviews")
+
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    collected = [0]
+
+    def track(**counters):
+        if progress:
+            progress(**counters)
+        with lock:
+            collected[0] += counters.get('reviews_parsed', 0)
+            if target_reviews and collected[0] >= target_reviews:
+                stop_event.set()
+
+    # Product details only need the first link, so fetch them alongside the reviews
+    details_future = link_executor.submit(get_product_details, links[0])
+
+    futures = {}
+    for link in links:
         url = modify_reviews_url(link)
-        print(f"\nExtracting reviews from: {url}") 
-    
-        # Get reviews
-        product_reviews = get_reviews(url, max_pages)
-        if product_reviews:
-            all_reviews.extend(product_reviews)
+        print(f"\nExtracting reviews from: {url}")
+        futures[link_executor.submit(get_reviews, url, max_pages, track, stop_event)] = link
+
+    for future in as_completed(futures):
+        try:
+            product_reviews = future.result()
+        except Exception as e:
+            print(f"Error extracting reviews from {futures[future]}: {e}")
+            continue
+        print(f"Collected {len(product_reviews)} reviews from {futures[future]}")
+        all_reviews.extend(product_reviews)
 
     if not all_reviews:
         print("No reviews found!")
@@ -229,23 +221,27 @@ def extractReviews(name, max_pages=15):
     print(f"\nSaved {len(all_reviews)} raw reviews to {raw_filename}")
 
     # Preprocess review descriptions
-    processed_reviews = preprocess_reviews(df_reviews['Description'].tolist())
+    processed_reviews, metadatas, dedup_stats = prepare_reviews(all_reviews, progress)
 
-    # Fetch product details from the first valid product link
-    price, image_url = get_product_details(links[0])
+    # Product details from the first valid product link
+    price, image_url = details_future.result()
 
     return {
         'raw_reviews': all_reviews,
         'processed_reviews': processed_reviews,
+        'review_metadata': metadatas,
         'price': price,
-        'image_url': image_url
+        'image_url': image_url,
+        'links': links,
+        'fingerprints': [review_fingerprint(review) for review in all_reviews],
+        'dedup': dedup_stats
     }
 
 def sanitize_filename(filename):
     sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', filename)
     return sanitized[:100]  # Truncate to 100 characters
 
-def extractReviewsFromLink(link, max_pages=15):
+def extractReviewsFromLink(link, max_pages=15, progress=None):
     sanitized_link = sanitize_filename(link)  # Sanitize FULL link first
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -255,9 +251,11 @@ def extractReviewsFromLink(link, max_pages=15):
     
     url = modify_reviews_url(link)
     print(f"\nExtracting reviews from: {url}") 
+    if progress:
+        progress(stage="fetching_reviews")
     
     # Get reviews
-    product_reviews = get_reviews(url, max_pages)
+    product_reviews = get_reviews(url, max_pages, progress)
     if product_reviews:
         all_reviews.extend(product_reviews)
 
@@ -280,7 +278,7 @@ def extractReviewsFromLink(link, max_pages=15):
     print(f"\nSaved {len(all_reviews)} raw reviews to {raw_filename}")
 
     # Preprocess review descriptions
-    processed_reviews = preprocess_reviews(df_reviews['Description'].tolist())
+    processed_reviews, metadatas, dedup_stats = prepare_reviews(all_reviews, progress)
 
     # Fetch product details from the link
     price, image_url = get_product_details(link)
@@ -288,6 +286,57 @@ def extractReviewsFromLink(link, max_pages=15):
     return {
         'raw_reviews': all_reviews,
         'processed_reviews': processed_reviews,
+        'review_metadata': metadatas,
         'price': price,
-        'image_url': image_url
+        'image_url': image_url,
+        'links': [link],
+        'fingerprints': [review_fingerprint(review) for review in all_reviews],
+        'dedup': dedup_stats
+    }
+
+def refreshReviews(links, known_fingerprints, max_pages=15, progress=None):
+    """Fetch only reviews that are not indexed yet.
+
+    Each link is read newest-first and stops at the first page on which every
+    review is already known, so a refresh usually costs one page per link.
+    """
+    known_fingerprints = set(known_fingerprints)
+    if progress:
+        progress(stage="fetching_reviews")
+
+    def all_known(page_reviews):
+        return all(review_fingerprint(review) in known_fingerprints for review in page_reviews)
+
+    futures = {}
+    for link in links:
+        url = newest_first_url(modify_reviews_url(link))
+        print(f"\nRefreshing reviews from: {url}")
+        # One page at a time: usually the first page is already all known, and prefetched pages would be wasted
+        futures[link_executor.submit(get_reviews, url, max_pages, progress, None, all_known, 1)] = link
+
+    new_reviews = []
+    fingerprints = []
+    seen = set(known_fingerprints)
+    for future in as_completed(futures):
+        try:
+            product_reviews = future.result()
+        except Exception as e:
+            print(f"Error refreshing reviews from {futures[future]}: {e}")
+            continue
+        for review in product_reviews:
+            fingerprint = review_fingerprint(review)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                new_reviews.append(review)
+                fingerprints.append(fingerprint)
+    print(f"Found {len(new_reviews)} new reviews")
+
+    processed_reviews, metadatas, dedup_stats = prepare_reviews(new_reviews, progress)
+
+    return {
+        'raw_reviews': new_reviews,
+        'processed_reviews': processed_reviews,
+        'review_metadata': metadatas,
+        'fingerprints': fingerprints,
+        'dedup': dedup_stats
     }
@@ -0,0 +1,181 @@
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+# Flipkart markup, in one place so a site redesign is a one-line fix.
+# Each entry is (tag, classes); an element matches when it has all the classes.
+SELECTORS = {
+    'review_container': ('div', 'cPHDOP'),
+    'rating': ('div', 'XQDdHH Ga3i8K'),
+    'title': ('p', 'z9E0IG'),
+    'review_text': ('div', 'ZmyHeo'),
+    'reviewer_name': ('p', '_2NsDsF AwS1CA'),
+    # The date shares _2NsDsF with the reviewer name, minus AwS1CA
+    'review_date': ('p', '_2NsDsF'),
+    'certified_buyer': ('p', 'MztJPv'),
+    'helpful_votes': ('span', 'tl9VpF'),
+    'price': ('div', 'Nx9bqj'),
+    'product_image': ('img', 'DByuf4 IZexXJ jLEJ7H'),
+}
+NAME_ONLY_CLASS = 'AwS1CA'
+
+
+def css_selector(key):
+    tag, classes = SELECTORS[key]
+    selector = tag + ''.join(f'.{c}' for c in classes.split())
+    if key == 'review_date':
+        selector += f':not(.{NAME_ONLY_CLASS})'
+    return selector
+
+
+def xpath_predicate(key):
+    tag, classes = SELECTORS[key]
+    tests = [f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes.split()]
+    if key == 'review_date':
+        tests.append(f"not(contains(concat(' ', normalize-space(@class), ' '), ' {NAME_ONLY_CLASS} '))")
+    return f"{tag}[{' and '.join(tests)}]"
+
+
+def _review_record(name, rating, title, review_text, date, certified_text, helpful_count):
+    return {
+        'Name': name,
+        'Rating': rating,
+        'Title': title,
+        'Description': review_text,
+        'Date': date,
+        'Certified_Buyer': 'Yes' if certified_text and 'Certified Buyer' in certified_text else 'No',
+        'Helpful_Votes': helpful_count,
+    }
+
+
+def _class_matcher(*classes):
+    # SoupStrainer sees the raw class attribute while parsing, so split it ourselves
+    wanted = set(classes)
+    return lambda value: bool(value) and not wanted.isdisjoint(value.split())
+
+
+class SoupReviewParser:
+    """BeautifulSoup backend; parses only the review containers via a SoupStrainer."""
+
+    name = 'bs4'
+
+    def __init__(self, features='html.parser'):
+        self.features = features
+        tag, classes = SELECTORS['review_container']
+        self._container_strainer = SoupStrainer(tag, class_=_class_matcher(classes.split()[0]))
+        self._details_strainer = SoupStrainer(class_=_class_matcher(
+            SELECTORS['price'][1].split()[0], SELECTORS['product_image'][1].split()[0]))
+        self._selectors = {key: css_selector(key) for key in SELECTORS}
+
+    def _text(self, container, key, default='N/A'):
+        element = container.select_one(self._selectors[key])
+        return element.get_text().strip() if element else default
+
+    def parse_reviews(self, content):
+        soup = BeautifulSoup(content, self.features, parse_only=self._container_strainer)
+        reviews = []
+        for container in soup.select(self._selectors['review_container']):
+            try:
+                review_div = container.select_one(self._selectors['review_text'])
+                text_div = review_div.find('div') if review_div else None
+                certified = container.select_one(self._selectors['certified_buyer'])
+                reviews.append(_review_record(
+                    self._text(container, 'reviewer_name'),
+                    self._text(container, 'rating'),
+                    self._text(container, 'title'),
+                    text_div.get_text().strip() if text_div else 'N/A',
+                    self._text(container, 'review_date'),
+                    certified.get_text() if certified else None,
+                    self._text(container, 'helpful_votes', '0'),
+                ))
+            except Exception as e:
+                print(f"Error processing review: {e}")
+                continue
+        return reviews
+
+    def parse_product_details(self, content):
+        soup = BeautifulSoup(content, self.features, parse_only=self._details_strainer)
+        price_div = soup.select_one(self._selectors['price'])
+        img_tag = soup.select_one(self._selectors['product_image'])
+        price = price_div.get_text().strip() if price_div else "N/A"
+        image_url = img_tag.get('src', "N/A") if img_tag else "N/A"
+        return price, image_url
+
+
+class LxmlReviewParser:
+    """lxml backend using XPath expressions compiled once from SELECTORS."""
+
+    name = 'lxml'
+
+    def __init__(self):
+        self._containers = etree.XPath(f"//{xpath_predicate('review_container')}")
+        self._fields = {
+            key: etree.XPath(f".//{xpath_predicate(key)}")
+            for key in ('rating', 'title', 'reviewer_name', 'review_date', 'certified_buyer', 'helpful_votes')
+        }
+        self._review_text = etree.XPath(f".//{xpath_predicate('review_text')}//div")
+        self._price = etree.XPath(f"//{xpath_predicate('price')}")
+        self._image = etree.XPath(f"//{xpath_predicate('product_image')}/@src")
+        # Flipkart serves UTF-8; without this lxml guesses latin-1 for pages lacking a meta charset
+        self._html_parser = lxml.html.HTMLParser(encoding='utf-8')
+
+    def _parse(self, content):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return etree.fromstring(content, self._html_parser)
+
+    def _text(self, container, key, default='N/A'):
+        found = self._fields[key](container)
+        return found[0].text_content().strip() if found else default
+
+    def parse_reviews(self, content):
+        if not content:
+            return []
+        root = self._parse(content)
+        reviews = []
+        for container in self._containers(root):
+            try:
+                text_div = self._review_text(container)
+                certified = self._fields['certified_buyer'](container)
+                reviews.append(_review_record(
+                    self._text(container, 'reviewer_name'),
+                    self._text(container, 'rating'),
+                    self._text(container, 'title'),
+                    text_div[0].text_content().strip() if text_div else 'N/A',
+                    self._text(container, 'review_date'),
+                    certified[0].text_content() if certified else None,
+                    self._text(container, 'helpful_votes', '0'),
+                ))
+            except Exception as e:
+                print(f"Error processing review: {e}")
+                continue
+        return reviews
+
+    def parse_product_details(self, content):
+        if not content:
+            return "N/A", "N/A"
+        root = self._parse(content)
+        price_div = self._price(root)
+        image = self._image(root)
+        price = price_div[0].text_content().strip() if price_div else "N/A"
+        return price, (str(image[0]) if image else "N/A")
+
+
+PARSERS = {'bs4': SoupReviewParser, 'lxml': LxmlReviewParser}
+
+
+def get_parser(name=None):
+    """Return the parser named by REVIEW_PARSER (default lxml), falling back to BeautifulSoup."""
+    name = name or os.getenv("REVIEW_PARSER", "lxml")
+    if name == 'lxml' and lxml is None:
+        print("lxml is not installed; falling back to the BeautifulSoup review parser")
+        name = 'bs4'
+    return PARSERS[name]()
+
+
+parser = get_parser()
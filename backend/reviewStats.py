@@ -0,0 +1,149 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Columns kept per review, one typed array each; rating 0 and month -1 mean unknown
+COLUMNS = {
+    'fingerprint': 'S16',
+    'rating': np.int8,
+    'month': np.int32,
+    'certified': np.bool_,
+    'helpful': np.int32,
+}
+
+MONTHS = {name: i for i, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'])}
+ABSOLUTE_DATE_RE = re.compile(r'([a-z]{3})[a-z]*,?\s+(\d{4})')
+RELATIVE_DATE_RE = re.compile(r'(\d+|an?)\s+(day|week|month|year)s?\s+ago')
+MONTHS_PER_UNIT = {'day': 1 / 30, 'week': 7 / 30, 'month': 1, 'year': 12}
+CACHED_PRODUCTS = 256
+
+
+def parse_month(date, now=None):
+    """Months since year 0 for Flipkart dates like "Feb, 2024" or "3 months ago"; -1 if unknown."""
+    date = str(date).lower().strip()
+    match = ABSOLUTE_DATE_RE.search(date)
+    if match and match.group(1) in MONTHS:
+        return int(match.group(2)) * 12 + MONTHS[match.group(1)]
+    now = time.gmtime(now if now is not None else time.time())
+    current = now.tm_year * 12 + now.tm_mon - 1
+    match = RELATIVE_DATE_RE.search(date)
+    if match:
+        amount = 1 if match.group(1) in ('a', 'an') else int(match.group(1))
+        return current - int(amount * MONTHS_PER_UNIT[match.group(2)])
+    if date in ('today', 'yesterday'):
+        return current
+    return -1
+
+
+def _int(value, default=0):
+    try:
+        return int(float(str(value).replace(',', '').strip()))
+    except ValueError:
+        return default
+
+
+def review_columns(metadatas, now=None):
+    """Typed columns for review metadata dicts (see reviewExtractor.review_metadata), one row per fingerprint.
+
+    now is when the reviews were scraped, for resolving relative dates.
+    """
+    seen = set()
+    rows = []
+    for metadata in metadatas:
+        fingerprint = metadata.get('fingerprint')
+        if fingerprint:
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+        rating = _int(metadata.get('rating'))
+        rows.append((
+            str(fingerprint or '').encode('ascii', 'ignore'),
+            rating if 1 <= rating <= 5 else 0,
+            parse_month(metadata.get('date', ''), now),
+            metadata.get('certified_buyer') == 'Yes',
+            max(0, _int(metadata.get('helpful_votes'))),
+        ))
+    return {
+        name: np.array([row[i] for row in rows], dtype=dtype)
+        for i, (name, dtype) in enumerate(COLUMNS.items())
+    }
+
+
+def merge_columns(columns, new_columns):
+    """Append rows whose fingerprints are not already in columns."""
+    fresh = ~np.isin(new_columns['fingerprint'], columns['fingerprint'])
+    return {name: np.concatenate([columns[name], new_columns[name][fresh]]) for name in COLUMNS}
+
+
+def _mean(ratings, weights=None):
+    if not len(ratings):
+        return None
+    return round(float(np.average(ratings, weights=weights)), 2)
+
+
+def analytics(columns):
+    """Rating histogram, plain, helpful-weighted and certified-only means, and monthly trend."""
+    rating = columns['rating']
+    rated = rating > 0
+    ratings = rating[rated].astype(np.float64)
+    # Every review counts once, plus once per helpful vote
+    weights = 1 + columns['helpful'][rated]
+    certified = columns['certified'][rated]
+    histogram = np.bincount(rating[rated], minlength=6)[1:6]
+
+    over_time = []
+    months = columns['month'][rated]
+    dated = months >= 0
+    if dated.any():
+        first = int(months[dated].min())
+        offsets = months[dated] - first
+        counts = np.bincount(offsets)
+        sums = np.bincount(offsets, weights=ratings[dated])
+        for offset in np.flatnonzero(counts):
+            month = first + int(offset)
+            over_time.append({
+                "month": f"{month // 12:04d}-{month % 12 + 1:02d}",
+                "count": int(counts[offset]),
+                "mean": round(float(sums[offset] / counts[offset]), 2),
+            })
+
+    return {
+        "reviews": int(len(rating)),
+        "rated": int(rated.sum()),
+        "histogram": {str(stars): int(count) for stars, count in enumerate(histogram, start=1)},
+        "mean": _mean(ratings),
+        "helpful_weighted_mean": _mean(ratings, weights),
+        "certified_mean": _mean(ratings[certified]),
+        "certified_count": int(certified.sum()),
+        "over_time": over_time,
+    }
+
+
+class ColumnsCache:
+    """Loaded rating columns per product, reloaded when the file on disk changes."""
+
+    def __init__(self, max_products=CACHED_PRODUCTS):
+        self.max_products = max_products
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, columns):
+        with self._lock:
+            self._entries[key] = (version, columns)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_products:
+                self._entries.popitem(last=False)
+
+
+columns_cache = ColumnsCache()
@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+
+CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join("product_dbs", "search_cache.db"))
+CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_HOURS", "168")) * 3600
+
+
+def normalize_query(query):
+    """Fold case, punctuation and whitespace so obvious variants share one entry."""
+    query = re.sub(r'[^\w\s]', ' ', query.lower())
+    return ' '.join(query.split())
+
+
+class SearchCache:
+    """On-disk cache of product search query -> Flipkart links, with a TTL."""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_results ("
+                "query_key TEXT PRIMARY KEY, query TEXT, links TEXT, created_at REAL)"
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, query):
+        """Return cached links for the query, or None if missing or expired."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT links, created_at FROM search_results WHERE query_key = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or time.time() - row[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, query, links, created_at=None):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?)",
+                    (normalize_query(query), query, json.dumps(links), created_at or time.time()),
+                )
+        finally:
+            conn.close()
+
+    def purge_expired(self):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(
+                    "DELETE FROM search_results WHERE created_at < ?", (time.time() - self.ttl,)
+                ).rowcount
+        finally:
+            conn.close()
+
+    def export_entries(self, filename):
+        """Write every unexpired entry to a JSON file; returns the number written."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT query, links, created_at FROM search_results WHERE created_at >= ?",
+                (time.time() - self.ttl,),
+            ).fetchall()
+        finally:
+            conn.close()
+        entries = [{"query": q, "links": json.loads(links), "created_at": created_at} for q, links, created_at in rows]
+        with open(filename, "w") as f:
+            json.dump(entries, f, indent=2)
+        return len(entries)
+
+    def import_entries(self, filename):
+        """Seed the cache from an export, keeping whichever copy of an entry is newer."""
+        with open(filename) as f:
+            entries = json.load(f)
+        conn = self._connect()
+        imported = 0
+        try:
+            with conn:
+                for entry in entries:
+                    if not entry.get("links"):
+                        continue
+                    imported += conn.execute(
+                        "INSERT INTO search_results VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(query_key) DO UPDATE SET query = excluded.query, "
+                        "links = excluded.links, created_at = excluded.created_at "
+                        "WHERE excluded.created_at > search_results.created_at",
+                        (normalize_query(entry["query"]), entry["query"], json.dumps(entry["links"]), entry["created_at"]),
+                    ).rowcount
+        finally:
+            conn.close()
+        return imported
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+search_cache = SearchCache()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import the product search cache.")
+    parser.add_argument("action", choices=["export", "import", "purge"])
+    parser.add_argument("filename", nargs="?", default="search_cache.json")
+    args = parser.parse_args()
+
+    if args.action == "export":
+        print(f"Exported {search_cache.export_entries(args.filename)} entries to {args.filename}")
+    elif args.action == "import":
+        print(f"Imported {search_cache.import_entries(args.filename)} entries from {args.filename}")
+    else:
+        print(f"Removed {search_cache.purge_expired()} expired entries")
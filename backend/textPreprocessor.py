@@ -0,0 +1,107 @@
+import os
+import re
+import threading
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+# Compiled once instead of on every review
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+READ_MORE_RE = re.compile(r'READ MORE', re.IGNORECASE)
+SPECIAL_CHARS_RE = re.compile(r'[^a-zA-Z0-9\s.,!?]')
+
+# Reviews are split across processes only for large batches, where it pays for process startup.
+# Each worker spends ~7s importing NLTK and loading WordNet while one process handles ~80k
+# reviews/s, so the pool only wins somewhere near a million reviews.
+PARALLEL_THRESHOLD = int(os.getenv("PREPROCESS_PARALLEL_THRESHOLD", "1000000"))
+CHUNK_SIZE = int(os.getenv("PREPROCESS_CHUNK_SIZE", "5000"))
+
+MIN_WORDS = 3
+
+_lock = threading.Lock()
+_stop_words = None
+_lemmatizer = None
+
+
+def stop_words():
+    """English stopwords as a frozenset, built once per process."""
+    global _stop_words
+    if _stop_words is None:
+        with _lock:
+            if _stop_words is None:
+                _stop_words = frozenset(stopwords.words('english'))
+    return _stop_words
+
+
+def _get_lemmatizer():
+    global _lemmatizer
+    if _lemmatizer is None:
+        with _lock:
+            if _lemmatizer is None:
+                lemmatizer = WordNetLemmatizer()
+                # WordNet loads lazily and not thread-safely; force it under the lock
+                lemmatizer.lemmatize('reviews')
+                _lemmatizer = lemmatizer
+    return _lemmatizer
+
+
+@lru_cache(maxsize=200_000)
+def lemmatize_word(word):
+    """Review vocabulary is small and repetitive, so each word is lemmatized once."""
+    return _get_lemmatizer().lemmatize(word)
+
+
+def clean_text(text):
+    """Clean the review text."""
+    text = HTML_TAG_RE.sub('', text)  # Remove HTML tags
+    text = READ_MORE_RE.sub('', text)  # Remove "READ MORE"
+    text = SPECIAL_CHARS_RE.sub('', text)  # Remove special characters but keep punctuation
+    return ' '.join(text.split())  # Normalize whitespace
+
+
+def remove_stopwords(text):
+    """Remove stopwords from text."""
+    stop = stop_words()
+    return ' '.join(word for word in text.split() if word.lower() not in stop)
+
+
+def lemmatize_text(text):
+    """Lemmatize words in text."""
+    return ' '.join(lemmatize_word(word) for word in text.split())
+
+
+def preprocess_review(review):
+    """Clean, drop stopwords and lemmatize one review; returns '' if too short to keep."""
+    stop = stop_words()
+    words = [lemmatize_word(word) for word in clean_text(review).split() if word.lower() not in stop]
+    return ' '.join(words) if len(words) >= MIN_WORDS else ''
+
+
+def _preprocess_chunk(reviews):
+    return [preprocess_review(review) for review in reviews]
+
+
+def preprocess_batch(reviews, processes=None):
+    """Preprocess reviews in order, returning '' for dropped ones.
+
+    Batches of PARALLEL_THRESHOLD reviews or more are split into chunks on a
+    process pool; pass processes=1 to force the in-process path.
+    """
+    reviews = list(reviews)
+    if processes == 1 or len(reviews) < PARALLEL_THRESHOLD:
+        return _preprocess_chunk(reviews)
+
+    chunks = [reviews[i:i + CHUNK_SIZE] for i in range(0, len(reviews), CHUNK_SIZE)]
+    # spawn, because forking a process that runs worker threads can deadlock
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = []
+        for chunk in executor.map(_preprocess_chunk, chunks):
+            results.extend(chunk)
+    return results
+
+
+def preprocess_reviews(reviews, processes=None):
+    """Apply preprocessing pipeline to reviews, keeping only meaningful ones."""
+    return [review for review in preprocess_batch(reviews, processes) if review]
@@ -8,17 +8,41 @@ import PersonalizeReview from './components/PersonalizeReview';
 import ProductRatingsChart from './components/ProductRatingsChart';
 
 const API_URL = 'http://localhost:8000';
+const INGEST_POLL_MS = 2000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Wait for a background ingestion job to finish; returns false if it failed.
+const waitForIngestion = async (jobId) => {
+  while (true) {
+    await sleep(INGEST_POLL_MS);
+    const response = await fetch(`${API_URL}/ingest/${jobId}`);
+    const job = await response.json();
+    if (job.status === 'done') return true;
+    if (job.status === 'failed' || !response.ok) return false;
+  }
+};
 
 const fetchData = async (endpoint, data, loadingKey, setLoading) => {
   try {
     setLoading((prev) => ({ ...prev, [loadingKey]: true }));
-    const response = await fetch(`${API_URL}${endpoint}`, {
+    const post = () => fetch(`${API_URL}${endpoint}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
       body: JSON.stringify(data),
     });
+    let response = await post();
+    // The product is still being scraped and indexed; poll the job, then retry
+    while (response.status === 202) {
+      const { job_id: jobId } = await response.json();
+      if (!(await waitForIngestion(jobId))) {
+        setLoading((prev) => ({ ...prev, [loadingKey]: false }));
+        return {};
+      }
+      response = await post();
+    }
     const result = await response.json();
     setLoading((prev) => ({ ...prev, [loadingKey]: false }));
     return result;
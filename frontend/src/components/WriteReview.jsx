@@ -1,22 +1,38 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import ReactMarkdown from 'react-markdown';
 
+// Drafts shorter than this are not worth a suggestion
+const MIN_DRAFT_LENGTH = 20;
+
 export default function WriteReview({ productName, fetchData, loading, setLoading }) {
   const [reviewText, setReviewText] = useState('');
   const [completionResult, setCompletionResult] = useState('');
   const [feedback, setFeedback] = useState('');
+  // The server debounces and cancels per session, so every keystroke can be sent
+  const sessionId = useRef(crypto.randomUUID());
+
+  const draftAssist = async (text, loadingKey) => {
+    const data = await fetchData('/draft_assist', { session_id: sessionId.current, text }, loadingKey, setLoading);
+    if (!data || data.status === 'superseded') return null;
+    setCompletionResult(data.completion);
+    setFeedback(data.feedback);
+    return data;
+  };
+
+  const handleChange = (e) => {
+    setReviewText(e.target.value);
+    if (e.target.value.trim().length >= MIN_DRAFT_LENGTH) draftAssist(e.target.value, 'draft');
+  };
 
   const getTextCompletion = async () => {
-    const data = await fetchData('/text_completion', { text: reviewText }, 'completion', setLoading);
-    if (data) {
-      setCompletionResult(data.completion);
-      setReviewText(data.completion); // Update reviewText with the completed text
+    const data = await draftAssist(reviewText, 'completion');
+    if (data && data.completion) {
+      setReviewText(`${reviewText.trimEnd()} ${data.completion}`); // Append the continuation to the draft
     }
   };
 
   const getReviewFeedback = async () => {
-    const data = await fetchData('/real_time_feedback', { text: reviewText }, 'feedback', setLoading);
-    if (data) setFeedback(data.feedback);
+    await draftAssist(reviewText, 'feedback');
   };
 
   const handleSubmit = (e) => {
@@ -30,7 +46,7 @@ export default function WriteReview({ productName, fetchData, loading, setLoadin
       <form onSubmit={handleSubmit}>
         <textarea
           value={reviewText}
-          onChange={(e) => setReviewText(e.target.value)}
+          onChange={handleChange}
           placeholder="Write your review here"
           className="border p-3 rounded-lg shadow-sm w-full h-32 mb-4"
         />